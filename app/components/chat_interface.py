@@ -2,11 +2,41 @@ from __future__ import annotations
 
 import streamlit as st
 
-from src.rag_pipeline import RAGPipeline
+from app.components.resources import get_pipeline
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _filter_values() -> dict:
+    return get_pipeline().store.filter_values()
+
+
+def _scope_filters() -> dict:
+    try:
+        values = _filter_values()
+    except Exception:
+        # Scoping is optional: with the database down the chat still loads,
+        # and the question itself reports the error.
+        values = {}
+    if not any(values.values()):
+        return {}
+    departments = doc_types = None
+    with st.sidebar:
+        st.header("Scope")
+        if values.get("department"):
+            departments = st.multiselect("Department", values["department"])
+        if values.get("doc_type"):
+            doc_types = st.multiselect("Document type", values["doc_type"])
+    filters = {}
+    if departments:
+        filters["department"] = departments
+    if doc_types:
+        filters["doc_type"] = doc_types
+    return filters
 
 
 def render_chat() -> None:
     st.subheader("Ask the Policy Assistant")
+    filters = _scope_filters()
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
 
@@ -21,10 +51,31 @@ def render_chat() -> None:
             st.markdown(question)
 
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                pipeline = RAGPipeline()
-                result = pipeline.answer_query(question)
-                answer = result["answer"]
-                st.markdown(answer)
+            pipeline = get_pipeline()
+            final: dict = {}
+
+            def tokens():
+                for event in pipeline.answer_query_stream(question, filters=filters or None):
+                    if event["type"] == "token":
+                        yield event["text"]
+                    else:
+                        final.update(event)
+
+            with st.spinner("Searching policies..."):
+                stream = tokens()
+                first = next(stream, "")
+            streamed = st.write_stream(_prepend(first, stream))
+            answer = final.get("answer", streamed)
+
+            ttft = final.get("time_to_first_token")
+            if ttft is not None:
+                st.session_state.setdefault("time_to_first_token", []).append(ttft)
+                st.caption(f"First token after {ttft:.2f}s")
 
         st.session_state.chat_history.append({"role": "assistant", "content": answer})
+
+
+def _prepend(first: str, rest):
+    if first:
+        yield first
+    yield from rest
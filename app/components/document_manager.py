@@ -4,11 +4,8 @@ from pathlib import Path
 
 import streamlit as st
 
+from app.components.resources import get_db_pool, get_embeddings_manager, get_vector_store
 from config import settings
-from src.document_loader import load_documents
-from src.embeddings import EmbeddingsManager
-from src.utils import chunk_documents
-from src.vector_store import VectorStore
 
 UPLOAD_DIR = Path("data/processed")
 
@@ -41,30 +38,25 @@ def render_document_manager() -> None:
         with st.spinner("Saving uploads..."):
             paths = _save_uploads(uploads)
 
-        with st.spinner("Loading documents..."):
-            documents = load_documents(paths)
-            texts, metadatas = chunk_documents(documents)
+        from src.incremental import sync_paths
 
-        if not texts:
-            st.warning("No text found in the uploaded documents.")
-            return
-
-        embeddings_manager = EmbeddingsManager()
-        embeddings = []
-        with st.spinner("Generating embeddings..."):
-            for text in texts:
-                embeddings.append(embeddings_manager.embed_text(text))
-
-        store = VectorStore()
-        store.ensure_schema(embedding_dim=len(embeddings[0]))
+        with st.spinner("Loading, embedding and writing documents..."):
+            report = sync_paths(paths, get_vector_store(), get_embeddings_manager())
 
-        with st.spinner("Writing to database..."):
-            store.add_documents(texts, metadatas, embeddings)
-        store.close()
-
-        st.success(f"Ingested {len(texts)} chunks into the vector store.")
+        st.success(f"Sync complete: {report.summary()}.")
 
     st.markdown(
         f"**Current settings**: top_k={settings.similarity_top_k}, "
         f"threshold={settings.similarity_threshold}"
     )
+    with st.expander("Connection pool"):
+        st.json(get_db_pool().stats())
+    with st.expander("Query caches"):
+        from src.query_cache import get_query_caches
+
+        query_cache, answer_cache = get_query_caches()
+        st.json({"query_embeddings": query_cache.stats(), "answers": answer_cache.stats()})
+    with st.expander("Stage timings"):
+        from src.metrics import get_metrics
+
+        st.json(get_metrics().snapshot())
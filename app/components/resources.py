@@ -0,0 +1,55 @@
+"""Long-lived objects shared across Streamlit reruns and sessions.
+
+Each factory imports its backend on first use, so a rerun that never touches
+Bedrock or Postgres never loads boto3 or psycopg2.
+"""
+
+from __future__ import annotations
+
+import streamlit as st
+
+
+@st.cache_resource(show_spinner=False)
+def get_pipeline():
+    from src.rag_pipeline import RAGPipeline
+
+    return RAGPipeline()
+
+
+@st.cache_resource(show_spinner=False)
+def get_embeddings_manager():
+    from src.embeddings import EmbeddingsManager
+
+    return EmbeddingsManager()
+
+
+@st.cache_resource(show_spinner=False)
+def get_db_pool():
+    from src.db_pool import get_pool
+
+    return get_pool()
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_endpoint():
+    from src.metrics import start_metrics_server
+
+    return start_metrics_server()
+
+
+@st.cache_resource(show_spinner=False)
+def warm_bedrock_clients() -> dict:
+    from src.bedrock_clients import warmup
+
+    try:
+        return warmup()
+    except Exception as exc:
+        # A cold start is slower, not broken; the first real request reports the error.
+        return {"error": str(exc)}
+
+
+@st.cache_resource(show_spinner=False)
+def get_vector_store():
+    from src.vector_store import VectorStore
+
+    return VectorStore(pool=get_db_pool())
@@ -7,12 +7,21 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.components.chat_interface import render_chat  # noqa: E402
-from app.components.document_manager import render_document_manager  # noqa: E402
+from config import settings  # noqa: E402
 
 
 st.set_page_config(page_title="Enterprise Policy Assistant", layout="wide")
 
+if settings.metrics_port:
+    from app.components.resources import start_metrics_endpoint
+
+    start_metrics_endpoint()
+
+if settings.bedrock_warmup:
+    from app.components.resources import warm_bedrock_clients
+
+    warm_bedrock_clients()
+
 st.title("Enterprise Policy Assistant")
 st.write(
     "Search internal HR policies, SOPs, and knowledge-base documents with AI-powered "
@@ -23,7 +32,12 @@ with st.sidebar:
     st.header("Navigation")
     view = st.radio("Select view", ["Chat", "Document Manager"], index=0)
 
+# Import only the selected view so a rerun loads just the dependencies it needs.
 if view == "Chat":
+    from app.components.chat_interface import render_chat
+
     render_chat()
 else:
+    from app.components.document_manager import render_document_manager
+
     render_document_manager()
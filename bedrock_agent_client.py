@@ -1,14 +1,12 @@
-import boto3
 import json
 from typing import Dict, Any, Iterator
 
+from src.bedrock_clients import AGENT_RUNTIME, get_client
+
 class BedrockAgentClient:
     def __init__(self, region_name: str = 'us-east-1'):
-        """Initialize Bedrock Agent Runtime client"""
-        self.client = boto3.client(
-            'bedrock-agent-runtime',
-            region_name=region_name
-        )
+        """Initialize Bedrock Agent Runtime client (shared across instances)"""
+        self.client = get_client(AGENT_RUNTIME, region_name=region_name)
     
     def invoke_agent(
         self,
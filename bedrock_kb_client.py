@@ -1,8 +1,20 @@
-import boto3
 import json
-from typing import List, Dict, Optional
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Sequence
 from dataclasses import dataclass
 
+from config import settings
+from src.bedrock_clients import AGENT_RUNTIME, get_client
+from src.metrics import get_metrics
+from src.query_cache import RetrievalCache, get_retrieval_cache
+
+# Largest numberOfResults a single retrieve call accepts
+MAX_PAGE_SIZE = 100
+
 
 @dataclass
 class KnowledgeBaseResult:
@@ -20,7 +32,8 @@ class BedrockKnowledgeBaseClient:
         self, 
         knowledge_base_id: str,
         region_name: str = "us-east-1",
-        profile_name: Optional[str] = None
+        profile_name: Optional[str] = None,
+        cache: Optional[RetrievalCache] = None
     ):
         """
         Initialize the Bedrock Knowledge Base client
@@ -29,19 +42,75 @@ class BedrockKnowledgeBaseClient:
             knowledge_base_id: The ID of your Bedrock Knowledge Base
             region_name: AWS region (default: us-east-1)
             profile_name: AWS profile name (optional)
+            cache: Result cache (default: the process-wide KB_CACHE_SIZE/KB_CACHE_TTL cache)
         """
         self.knowledge_base_id = knowledge_base_id
         
-        session_kwargs = {"region_name": region_name}
-        if profile_name:
-            session_kwargs["profile_name"] = profile_name
-            
-        session = boto3.Session(**session_kwargs)
+        # Shared, process-wide client for Knowledge Base operations
+        self.bedrock_agent_runtime = get_client(
+            AGENT_RUNTIME, region_name=region_name, profile_name=profile_name
+        )
+        
+        self.cache = cache or get_retrieval_cache()
+        self.metrics = get_metrics()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=2000)
+        self._hits = 0
+        self._misses = 0
+        self._retrieve_calls = 0
         
-        # Client for Knowledge Base operations
-        self.bedrock_agent_runtime = session.client(
-            service_name="bedrock-agent-runtime"
+    def _parse_result(self, item: Dict) -> KnowledgeBaseResult:
+        return KnowledgeBaseResult(
+            content=item.get("content", {}).get("text", ""),
+            score=item.get("score", 0.0),
+            source=item.get("location", {}).get("s3Location", {}).get("uri", "Unknown"),
+            metadata=item.get("metadata", {})
         )
+    
+    def _retrieve(self, query_text: str, max_results: int) -> List[KnowledgeBaseResult]:
+        """Call retrieve, following nextToken until max_results results are collected"""
+        results = []
+        next_token = None
+        while True:
+            request = {
+                "knowledgeBaseId": self.knowledge_base_id,
+                "retrievalQuery": {"text": query_text},
+                "retrievalConfiguration": {
+                    "vectorSearchConfiguration": {
+                        "numberOfResults": min(max_results, MAX_PAGE_SIZE)
+                    }
+                }
+            }
+            if next_token:
+                request["nextToken"] = next_token
+            
+            start = time.perf_counter()
+            response = self.bedrock_agent_runtime.retrieve(**request)
+            elapsed = time.perf_counter() - start
+            self.metrics.observe("kb_retrieve_seconds", elapsed, kb=self.knowledge_base_id)
+            with self._stats_lock:
+                self._latencies.append(elapsed)
+                self._retrieve_calls += 1
+            
+            results.extend(
+                self._parse_result(item) for item in response.get("retrievalResults", [])
+            )
+            next_token = response.get("nextToken")
+            if not next_token or len(results) >= max_results:
+                return results[:max_results]
+    
+    def _lookup(self, key: tuple) -> Optional[List[KnowledgeBaseResult]]:
+        cached = self.cache.get(key)
+        hit = cached is not None
+        with self._stats_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+        self.metrics.inc(
+            "kb_cache_hits_total" if hit else "kb_cache_misses_total", kb=self.knowledge_base_id
+        )
+        return cached
         
     def query(
         self,
@@ -61,38 +130,123 @@ class BedrockKnowledgeBaseClient:
             List of KnowledgeBaseResult objects
         """
         try:
-            # Build retrieval configuration
-            retrieval_config = {
-                "vectorSearchConfiguration": {
-                    "numberOfResults": max_results
-                }
-            }
-            
-            response = self.bedrock_agent_runtime.retrieve(
-                knowledgeBaseId=self.knowledge_base_id,
-                retrievalQuery={
-                    "text": query_text
-                },
-                retrievalConfiguration=retrieval_config
-            )
-            
-            # Parse results
-            results = []
-            for item in response.get("retrievalResults", []):
-                result = KnowledgeBaseResult(
-                    content=item.get("content", {}).get("text", ""),
-                    score=item.get("score", 0.0),
-                    source=item.get("location", {}).get("s3Location", {}).get("uri", "Unknown"),
-                    metadata=item.get("metadata", {})
-                )
-                results.append(result)
-                
+            key = self.cache.key(self.knowledge_base_id, query_text, max_results)
+            results = self._lookup(key)
+            if results is None:
+                results = self._retrieve(query_text, max_results)
+                self.cache.put(key, results)
             return results
             
         except Exception as e:
             print(f"Error querying knowledge base: {str(e)}")
             raise
     
+    def query_many(
+        self,
+        query_texts: Sequence[str],
+        max_results: int = 5,
+        max_concurrency: Optional[int] = None
+    ) -> List[List[KnowledgeBaseResult]]:
+        """
+        Query the knowledge base for many questions at once
+        
+        Cached questions are answered from the result cache; the rest run as
+        parallel retrieve calls (at most max_concurrency in flight). Repeated
+        questions within the batch share one call.
+        
+        Args:
+            query_texts: The query strings
+            max_results: Maximum number of results per query (paged via nextToken)
+            max_concurrency: Parallel retrieve calls (default: KB_MAX_CONCURRENCY)
+            
+        Returns:
+            One list of KnowledgeBaseResult objects per query, in input order
+            
+        Raises:
+            The first retrieve error, after every other question has finished
+            and the successful results have been cached
+        """
+        start = time.perf_counter()
+        texts = list(query_texts)
+        results: List[Optional[List[KnowledgeBaseResult]]] = [None] * len(texts)
+        pending: Dict[tuple, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = self.cache.key(self.knowledge_base_id, text, max_results)
+            if key in pending:
+                pending[key].append(i)
+                continue
+            cached = self._lookup(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[key] = [i]
+        
+        def run(key: tuple):
+            # One failed question must not discard the others' results.
+            try:
+                return self._retrieve(texts[pending[key][0]], max_results), None
+            except Exception as e:
+                return None, e
+        
+        keys = list(pending)
+        workers = max(1, min(max_concurrency or settings.kb_max_concurrency, len(keys)))
+        if workers == 1:
+            fetched = [run(key) for key in keys]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(run, keys))
+        
+        errors = []
+        for key, (found, error) in zip(keys, fetched):
+            if error is not None:
+                errors.append(error)
+                continue
+            self.cache.put(key, found)
+            for i in pending[key]:
+                results[i] = list(found)
+        
+        self.metrics.log(
+            "kb_query_many",
+            knowledge_base_id=self.knowledge_base_id,
+            queries=len(texts),
+            retrieved=len(keys),
+            cached=len(texts) - sum(len(v) for v in pending.values()),
+            failed=len(errors),
+            seconds=round(time.perf_counter() - start, 4)
+        )
+        if errors:
+            print(
+                f"Error querying knowledge base: {len(errors)} of {len(keys)} retrieve calls "
+                f"failed, first: {str(errors[0])}"
+            )
+            raise errors[0]
+        return results
+    
+    def stats(self) -> Dict:
+        """Cache hit rate and per-call retrieve latency (milliseconds) for this client"""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            hits, misses, calls = self._hits, self._misses, self._retrieve_calls
+        lookups = hits + misses
+        
+        def percentile(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[int(q * (len(latencies) - 1))] * 1000, 2)
+        
+        return {
+            "queries": lookups,
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "retrieve_calls": calls,
+            "retrieve_ms_mean": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+            "retrieve_ms_p50": percentile(0.5),
+            "retrieve_ms_p95": percentile(0.95),
+            "retrieve_ms_max": percentile(1.0),
+            "cache": self.cache.stats()
+        }
+    
     def retrieve_and_generate(
         self,
         query_text: str,
@@ -20,9 +20,37 @@ class Settings:
     embeddings_model: str = os.getenv(
         "BEDROCK_EMBEDDINGS_MODEL", "amazon.titan-embed-text-v1"
     )
+    embeddings_batch_size: int = int(os.getenv("EMBEDDINGS_BATCH_SIZE", "96"))
+    embeddings_concurrency: int = int(os.getenv("EMBEDDINGS_CONCURRENCY", "8"))
+    embedding_cache_path: str = os.getenv(
+        "EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3"
+    )
+    embedding_cache_max_entries: int = int(
+        os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")
+    )
     llm_model: str = os.getenv(
         "BEDROCK_LLM_MODEL", "anthropic.claude-3-sonnet-20240229-v1:0"
     )
+    bedrock_max_concurrency: int = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+    bedrock_min_concurrency: int = int(os.getenv("BEDROCK_MIN_CONCURRENCY", "1"))
+    bedrock_decrease_factor: float = float(os.getenv("BEDROCK_DECREASE_FACTOR", "0.5"))
+    bedrock_rate_limit: float = float(os.getenv("BEDROCK_RATE_LIMIT", "0"))
+    bedrock_rate_limits: str = os.getenv("BEDROCK_RATE_LIMITS", "")
+    bedrock_rate_burst: float = float(os.getenv("BEDROCK_RATE_BURST", "0"))
+    bedrock_max_retries: int = int(os.getenv("BEDROCK_MAX_RETRIES", "6"))
+    bedrock_backoff_base: float = float(os.getenv("BEDROCK_BACKOFF_BASE", "0.25"))
+    bedrock_backoff_max: float = float(os.getenv("BEDROCK_BACKOFF_MAX", "20"))
+    bedrock_circuit_failures: int = int(os.getenv("BEDROCK_CIRCUIT_FAILURES", "8"))
+    bedrock_circuit_cooldown: float = float(os.getenv("BEDROCK_CIRCUIT_COOLDOWN", "30"))
+    bedrock_max_pool_connections: int = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "32"))
+    bedrock_tcp_keepalive: bool = os.getenv("BEDROCK_TCP_KEEPALIVE", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    bedrock_connect_timeout: float = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))
+    bedrock_read_timeout: float = float(os.getenv("BEDROCK_READ_TIMEOUT", "60"))
+    bedrock_warmup: bool = os.getenv("BEDROCK_WARMUP", "false").lower() in ("1", "true", "yes")
 
     db_host: str = os.getenv("DB_HOST", "localhost")
     db_port: int = int(os.getenv("DB_PORT", "5432"))
@@ -30,10 +58,65 @@ class Settings:
     db_user: str = os.getenv("DB_USER", "postgres")
     db_password: str = os.getenv("DB_PASSWORD", "")
 
+    db_pool_min: int = int(os.getenv("DB_POOL_MIN", "1"))
+    db_pool_max: int = int(os.getenv("DB_POOL_MAX", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_idle_timeout: float = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+    db_pool_health_check_after: float = float(
+        os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30")
+    )
+    db_batch_size: int = int(os.getenv("DB_BATCH_SIZE", "1000"))
+    db_write_method: str = os.getenv("DB_WRITE_METHOD", "copy")
+
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "postgres")
+    numpy_store_dir: str = os.getenv("NUMPY_STORE_DIR", "data/index")
+    vector_index_type: str = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+    hnsw_m: int = int(os.getenv("HNSW_M", "16"))
+    hnsw_ef_construction: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+    vector_recall_target: float = float(os.getenv("VECTOR_RECALL_TARGET", "0.95"))
+    vector_quantization: str = os.getenv("VECTOR_QUANTIZATION", "none")
+    vector_rerank_factor: int = int(os.getenv("VECTOR_RERANK_FACTOR", "4"))
+    vector_index_state_ttl: float = float(os.getenv("VECTOR_INDEX_STATE_TTL", "30"))
+    filter_exact_max_rows: int = int(os.getenv("FILTER_EXACT_MAX_ROWS", "2000"))
+    document_metadata_path: str = os.getenv("DOCUMENT_METADATA_PATH", "")
+
+    parse_workers: int = int(os.getenv("PARSE_WORKERS", "0"))
+    parse_cache_dir: str = os.getenv("PARSE_CACHE_DIR", ".cache/extracted")
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+
+    ingest_queue_size: int = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+    ingest_dedup: bool = os.getenv("INGEST_DEDUP", "true").lower() in ("1", "true", "yes")
+    dedup_simhash_distance: int = int(os.getenv("DEDUP_SIMHASH_DISTANCE", "0"))
+
     chunk_size: int = int(os.getenv("CHUNK_SIZE", "500"))
     chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "50"))
+    chunk_length_unit: str = os.getenv("CHUNK_LENGTH_UNIT", "chars")
     similarity_top_k: int = int(os.getenv("SIMILARITY_TOP_K", "5"))
     similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.3"))
+    mmr_enabled: bool = os.getenv("MMR_ENABLED", "false").lower() in ("1", "true", "yes")
+    mmr_fetch_k: int = int(os.getenv("MMR_FETCH_K", "20"))
+    mmr_lambda: float = float(os.getenv("MMR_LAMBDA", "0.5"))
+    mmr_time_budget_ms: float = float(os.getenv("MMR_TIME_BUDGET_MS", "5"))
+    context_token_budget: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "vector")
+    text_search_config: str = os.getenv("TEXT_SEARCH_CONFIG", "english")
+    hybrid_candidates: int = int(os.getenv("HYBRID_CANDIDATES", "40"))
+    hybrid_vector_weight: float = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+    hybrid_text_weight: float = float(os.getenv("HYBRID_TEXT_WEIGHT", "1.0"))
+    hybrid_rrf_k: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    query_cache_ttl: float = float(os.getenv("QUERY_CACHE_TTL", "86400"))
+    answer_cache_size: int = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+    answer_cache_ttl: float = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    answer_cache_max_distance: float = float(
+        os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.05")
+    )
+    kb_max_concurrency: int = int(os.getenv("KB_MAX_CONCURRENCY", "8"))
+    kb_cache_size: int = int(os.getenv("KB_CACHE_SIZE", "1024"))
+    kb_cache_ttl: float = float(os.getenv("KB_CACHE_TTL", "900"))
+    metrics_port: int = int(os.getenv("METRICS_PORT", "0"))
+    metrics_log_path: str = os.getenv("METRICS_LOG_PATH", "")
+    otel_enabled: bool = os.getenv("OTEL_ENABLED", "false").lower() in ("1", "true", "yes")
     max_tokens: int = int(os.getenv("MAX_TOKENS", "1024"))
     temperature: float = float(os.getenv("TEMPERATURE", "0.2"))
 
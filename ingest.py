@@ -1,28 +1,31 @@
 import argparse
 
-from src.document_loader import load_from_directory
-from src.embeddings import EmbeddingsManager
-from src.utils import chunk_documents
-from src.vector_store import VectorStore
-
 
 def create_vector_store(data_dir: str) -> None:
-    print(f"Loading documents from {data_dir} ...")
-    documents = load_from_directory(data_dir)
-    texts, metadatas = chunk_documents(documents)
-    if not texts:
-        raise SystemExit("No documents loaded.")
+    # Heavy imports stay out of module scope so `--help` starts instantly.
+    from src.embeddings import EmbeddingsManager
+    from src.incremental import sync_directory
+    from src.vector_store import VectorStore
 
-    print("Generating embeddings...")
+    print(f"Syncing documents from {data_dir} ...")
     embeddings_manager = EmbeddingsManager()
-    embeddings = [embeddings_manager.embed_text(text) for text in texts]
-
-    print("Writing to PostgreSQL...")
     store = VectorStore()
-    store.ensure_schema(embedding_dim=len(embeddings[0]))
-    store.add_documents(texts, metadatas, embeddings)
+    report = sync_directory(data_dir, store, embeddings_manager)
     store.close()
-    print(f"Ingested {len(texts)} chunks.")
+
+    for label, sources in (
+        ("Added", report.added),
+        ("Updated", report.updated),
+        ("Removed", report.removed),
+    ):
+        for source in sources:
+            print(f"  {label}: {source}")
+    print(f"Skipped {len(report.skipped)} unchanged files.")
+    for stage in report.stages:
+        print(f"  {stage.summary()}")
+    if report.index_action:
+        print(f"Vector index: {report.index_action}.")
+    print(f"Sync complete: {report.summary()}.")
 
 
 if __name__ == "__main__":
@@ -39,6 +42,8 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
     if args.reset:
+        from src.vector_store import VectorStore
+
         store = VectorStore()
         store.clear_documents()
         store.close()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import random
+import time
+
+from pgvector import Vector
+
+from src.db_pool import ConnectionPool
+from src.vector_store import VectorStore
+
+SCHEMA = "bench_add_documents"
+
+
+def _rows(count: int, dim: int) -> list:
+    # Built once, outside the timed region, so every method pays the same.
+    rng = random.Random(0)
+    return [
+        (
+            f"Synthetic policy chunk {i}. " * 20,
+            {"source": f"bench/doc_{i // 50}.pdf"},
+            [rng.random() for _ in range(dim)],
+        )
+        for i in range(count)
+    ]
+
+
+def _per_row(store: VectorStore, rows: list) -> None:
+    # The original add_documents loop: one INSERT per chunk.
+    with store._cursor() as cur:
+        for text, meta, embedding in rows:
+            cur.execute(
+                "INSERT INTO documents (content, metadata, embedding) VALUES (%s, %s, %s);",
+                (text, json.dumps(meta), Vector(embedding)),
+            )
+
+
+def _bulk(method: str, batch_size: int):
+    def run(store: VectorStore, rows: list) -> None:
+        store.add_documents(
+            [row[0] for row in rows],
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            batch_size=batch_size,
+            method=method,
+        )
+
+    return run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare VectorStore write paths.")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(minconn=1, maxconn=1, options=f"-c search_path={SCHEMA},public")
+    store = VectorStore(pool=pool)
+    with store._cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        cur.execute(f"CREATE SCHEMA {SCHEMA};")
+    store.ensure_schema(embedding_dim=args.dim)
+    rows = _rows(args.rows, args.dim)
+
+    runs = [
+        ("per-row INSERT", _per_row),
+        ("execute_values", _bulk("values", args.batch_size)),
+        ("binary COPY", _bulk("copy", args.batch_size)),
+    ]
+    try:
+        for name, run in runs:
+            with store._cursor() as cur:
+                cur.execute("TRUNCATE TABLE documents;")
+            start = time.perf_counter()
+            run(store, rows)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<16} {elapsed:8.2f}s  {args.rows / elapsed:10.0f} rows/s")
+    finally:
+        with store._cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        pool.closeall()
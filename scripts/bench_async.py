@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import sys
+import time
+
+from src.async_pipeline import AsyncRAGPipeline
+from src.fakes import FakeAsyncStore, FakeEmbeddings, FakeLLM
+from src.query_cache import QueryEmbeddingCache, SemanticAnswerCache
+
+
+async def _run(concurrency: int, questions: int, args) -> float:
+    pipeline = AsyncRAGPipeline(
+        embeddings=FakeEmbeddings(dim=8, latency=args.embed_latency),
+        llm=FakeLLM(latency=args.llm_latency),
+        store=FakeAsyncStore(latency=args.db_latency),
+        max_workers=concurrency,
+    )
+    # Every question runs the full path; the caches would hide it.
+    pipeline.query_cache = QueryEmbeddingCache(max_entries=0)
+    pipeline.answer_cache = SemanticAnswerCache(max_entries=0)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ask(i: int):
+        async with semaphore:
+            return await pipeline.answer_query(f"Question {i} about leave policy")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(ask(i) for i in range(questions)))
+    elapsed = time.perf_counter() - start
+    assert len(results) == questions and all(r["answer"] for r in results)
+    await pipeline.close()
+    return questions / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check AsyncRAGPipeline throughput scaling with stubbed Bedrock and DB."
+    )
+    parser.add_argument("--questions", type=int, default=64)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--db-latency", type=float, default=0.01)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    parser.add_argument(
+        "--min-efficiency",
+        type=float,
+        default=0.5,
+        help="Fail when speedup / (level / first level) drops below this",
+    )
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",")]
+    baseline = None
+    failures = []
+    for level in levels:
+        qps = asyncio.run(_run(level, args.questions, args))
+        baseline = baseline or qps
+        speedup = qps / baseline
+        print(f"concurrency={level:<3} {qps:8.2f} questions/s  ({speedup:5.1f}x)")
+        # Past one question per worker there is nothing left to overlap.
+        ideal = min(level, args.questions) / min(levels[0], args.questions)
+        if speedup < args.min_efficiency * ideal:
+            failures.append(
+                f"concurrency={level}: {speedup:.1f}x is below "
+                f"{args.min_efficiency:.0%} of the ideal {ideal:.0f}x"
+            )
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
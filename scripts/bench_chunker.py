@@ -0,0 +1,73 @@
+import argparse
+import time
+from pathlib import Path
+
+from src.chunker import RecursiveChunker
+from src.document_loader import load_documents
+from src.fakes import synthetic_documents
+
+
+def _time(split, texts, repeat: int) -> tuple:
+    best = float("inf")
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = [split(text) for text in texts]
+        best = min(best, time.perf_counter() - start)
+    return best, chunks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the native chunker with LangChain's splitter."
+    )
+    parser.add_argument("directory", nargs="?", help="Documents to chunk (default: synthetic)")
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic document count")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.directory:
+        files = [str(p) for p in Path(args.directory).rglob("*") if p.is_file()]
+        texts = [doc.text for doc in load_documents(files)]
+    else:
+        texts = [doc.text for doc in synthetic_documents(args.docs)]
+    total_chars = sum(len(text) for text in texts)
+    print(f"{len(texts)} documents, {total_chars} characters")
+
+    native = RecursiveChunker(args.chunk_size, args.chunk_overlap)
+    native_seconds, native_chunks = _time(
+        lambda text: [c.text for c in native.split(text)], texts, args.repeat
+    )
+    print(
+        f"native:    {native_seconds:.3f}s "
+        f"({total_chars / native_seconds / 1e6:.1f} M chars/s), "
+        f"{sum(len(c) for c in native_chunks)} chunks"
+    )
+
+    # Offsets must point back at the chunk text.
+    for text in texts:
+        for chunk in native.split(text):
+            assert text[chunk.start : chunk.end] == chunk.text
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except Exception:
+        print("langchain-text-splitters is not installed; skipping the comparison.")
+        raise SystemExit(0)
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap
+    )
+    lc_seconds, lc_chunks = _time(splitter.split_text, texts, args.repeat)
+    print(
+        f"langchain: {lc_seconds:.3f}s "
+        f"({total_chars / lc_seconds / 1e6:.1f} M chars/s), "
+        f"{sum(len(c) for c in lc_chunks)} chunks"
+    )
+    mismatched = sum(1 for a, b in zip(native_chunks, lc_chunks) if a != b)
+    print(f"speedup: {lc_seconds / native_seconds:.2f}x")
+    print(f"parity: {len(texts) - mismatched}/{len(texts)} documents chunk identically")
+    if mismatched:
+        raise SystemExit(1)
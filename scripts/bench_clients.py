@@ -0,0 +1,53 @@
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+from src.bedrock_clients import AGENT_RUNTIME, RUNTIME, get_client, registered, reset_clients
+
+
+def _fresh(service: str):
+    """What each class did before: a new boto3 client per instance."""
+    import boto3
+
+    return boto3.client(service_name=service, region_name=settings.aws_region)
+
+
+def _time(fn, service: str, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(service)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Per-call client setup cost: new boto3 client vs. the shared registry."
+    )
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'service':>22} {'new client ms':>14} {'registry ms':>12}")
+    for service in (RUNTIME, AGENT_RUNTIME):
+        fresh = _time(_fresh, service, args.rounds)
+        reset_clients()
+        get_client(service)
+        shared = _time(get_client, service, args.rounds)
+        print(f"{service:>22} {fresh:>14.2f} {shared:>12.4f}")
+
+    reset_clients()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        clients = list(pool.map(lambda _: get_client(RUNTIME), range(args.threads * 4)))
+    print(
+        f"\n{len(clients)} concurrent lookups from {args.threads} threads -> "
+        f"{len({id(c) for c in clients})} client(s); registered: {registered()}"
+    )
+    config = clients[0].meta.config
+    print(
+        f"max_pool_connections={config.max_pool_connections} tcp_keepalive={config.tcp_keepalive} "
+        f"connect_timeout={config.connect_timeout} read_timeout={config.read_timeout}"
+    )
@@ -0,0 +1,215 @@
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from config import settings
+from src.fakes import FakeEmbeddings, FakeLLM, synthetic_documents, synthetic_questions
+from src.ingest_pipeline import StreamingIngest
+from src.query_cache import QueryEmbeddingCache, SemanticAnswerCache
+from src.rag_pipeline import RAGPipeline
+
+SCHEMA = "bench_e2e"
+STAGES = ("embed", "cache_lookup", "retrieve", "prompt", "generate", "total")
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p90_ms": round(float(np.percentile(values, 90)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _open_store(backend: str, dim: int, workdir: str):
+    if backend == "numpy":
+        from src.numpy_store import NumpyVectorStore
+
+        return NumpyVectorStore(workdir), None
+
+    from src.db_pool import ConnectionPool
+    from src.vector_store import VectorStore
+
+    pool = ConnectionPool(minconn=1, maxconn=4, options=f"-c search_path={SCHEMA},public")
+    store = VectorStore(pool=pool)
+    with store._cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        cur.execute(f"CREATE SCHEMA {SCHEMA};")
+    store.ensure_schema(embedding_dim=dim)
+    return store, pool
+
+
+def run_ingest(store, embeddings: FakeEmbeddings, documents) -> dict:
+    def write_batch(groups) -> int:
+        return store.add_documents(
+            [text for group in groups for text in group.texts],
+            [metadata for group in groups for metadata in group.metadatas],
+            np.concatenate([group.embeddings for group in groups]),
+        )
+
+    pipeline = StreamingIngest(embeddings)
+    start = time.perf_counter()
+    stages = pipeline.run(documents, write_batch)
+    elapsed = time.perf_counter() - start
+    index_start = time.perf_counter()
+    index_action = store.maintain_index(concurrently=False)
+    chunks = stages[-1].rows
+    return {
+        "documents": len(documents),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(chunks / elapsed, 1) if elapsed else None,
+        "embedding_requests": pipeline.embedding_requests,
+        "index_action": index_action,
+        "index_seconds": round(time.perf_counter() - index_start, 3),
+        "stages": {
+            stage.name: {
+                "items": stage.items,
+                "rows": stage.rows,
+                "busy_seconds": round(stage.busy_seconds, 3),
+                "max_queue_depth": stage.max_queue_depth,
+            }
+            for stage in stages
+        },
+    }
+
+
+def run_queries(pipeline: RAGPipeline, questions) -> dict:
+    samples = {stage: [] for stage in STAGES}
+    input_tokens = context_tokens = 0
+    for question in questions:
+        result = pipeline.answer_query(question)
+        for stage in STAGES:
+            if stage in result["timings"]:
+                samples[stage].append(result["timings"][stage])
+        input_tokens += result.get("context", {}).get("input_tokens", 0)
+        context_tokens += result.get("context", {}).get("context_tokens", 0)
+    stats = {stage: percentiles(values) for stage, values in samples.items()}
+    stats["context_tokens"] = {
+        "retrieved": input_tokens,
+        "sent": context_tokens,
+        "saved": input_tokens - context_tokens,
+    }
+    return stats
+
+
+def _compare(current: dict, baseline: dict) -> None:
+    before = baseline["ingest"]["chunks_per_second"]
+    after = current["ingest"]["chunks_per_second"]
+    if before and after:
+        print(f"ingest: {before:.0f} -> {after:.0f} chunks/s ({after / before:.2f}x)")
+    for stage in STAGES:
+        old = baseline["query"].get(stage, {})
+        new = current["query"].get(stage, {})
+        for key in ("p50_ms", "p95_ms"):
+            if key in old and key in new:
+                print(f"{stage:<13} {key}: {old[key]:8.3f} -> {new[key]:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline ingest + query benchmark with fake Bedrock models."
+    )
+    parser.add_argument("--backend", choices=["numpy", "postgres"], default="numpy")
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic documents")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Seconds per request")
+    parser.add_argument("--embed-batch-size", type=int, default=1)
+    parser.add_argument("--embed-concurrency", type=int, default=settings.embeddings_concurrency)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per answer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON path (default: bench_results/e2e-<time>.json)")
+    parser.add_argument("--baseline", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.docs, seed=args.seed)
+    questions = synthetic_questions(args.queries, seed=args.seed + 1)
+    embeddings = FakeEmbeddings(
+        dim=args.dim,
+        latency=args.embed_latency,
+        batch_size=args.embed_batch_size,
+        concurrency=args.embed_concurrency,
+    )
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store, pool = _open_store(args.backend, args.dim, workdir)
+        try:
+            ingest = run_ingest(store, embeddings, documents)
+            pipeline = RAGPipeline(
+                embeddings=FakeEmbeddings(dim=args.dim, latency=args.embed_latency),
+                llm=FakeLLM(latency=args.llm_latency),
+                store=store,
+            )
+            # Every question runs the full path; the caches would hide it.
+            pipeline.query_cache = QueryEmbeddingCache(max_entries=0)
+            pipeline.answer_cache = SemanticAnswerCache(max_entries=0)
+            query = run_queries(pipeline, questions)
+        finally:
+            if pool is not None:
+                with store._cursor() as cur:
+                    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+                pool.closeall()
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            **vars(args),
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "top_k": settings.similarity_top_k,
+            "retrieval_mode": settings.retrieval_mode,
+            "vector_index_type": settings.vector_index_type,
+        },
+        "ingest": ingest,
+        "query": query,
+    }
+    output = Path(
+        args.output
+        or f"bench_results/e2e-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.backend}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    print(
+        f"ingest: {ingest['chunks']} chunks from {ingest['documents']} docs in "
+        f"{ingest['seconds']:.2f}s ({ingest['chunks_per_second']:.0f} chunks/s)"
+    )
+    for stage in STAGES:
+        stats = query[stage]
+        print(
+            f"{stage:<13} p50 {stats['p50_ms']:8.3f}ms  p95 {stats['p95_ms']:8.3f}ms  "
+            f"p99 {stats['p99_ms']:8.3f}ms"
+        )
+    tokens = query["context_tokens"]
+    print(
+        f"context tokens: {tokens['sent']} sent of {tokens['retrieved']} retrieved "
+        f"({tokens['saved']} saved)"
+    )
+    if args.baseline:
+        _compare(result, json.loads(Path(args.baseline).read_text()))
+    print(f"Wrote {output}")
@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+
+from bedrock_kb_client import BedrockKnowledgeBaseClient
+from src.fakes import FakeAgentRuntimeClient
+from src.query_cache import RetrievalCache
+
+
+def _client(args, cache_entries: int) -> BedrockKnowledgeBaseClient:
+    client = BedrockKnowledgeBaseClient("BENCHKB", cache=RetrievalCache(max_entries=cache_entries))
+    client.bedrock_agent_runtime = FakeAgentRuntimeClient(
+        latency=args.latency, available=args.available, page_size=args.page_size
+    )
+    return client
+
+
+def _row(label: str, seconds: float, client: BedrockKnowledgeBaseClient, queries: int) -> None:
+    stats = client.stats()
+    print(
+        f"{label:>22} {seconds:>8.2f} {queries / seconds:>9.1f} {stats['retrieve_calls']:>6} "
+        f"{stats['hit_rate']:>8.2f} {stats['retrieve_ms_p50'] or 0:>8.1f} "
+        f"{stats['retrieve_ms_p95'] or 0:>8.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sequential KB queries vs. query_many fan-out with the result cache."
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=80, help="Distinct questions in the batch")
+    parser.add_argument("--max-results", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per retrieve call")
+    parser.add_argument("--available", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    questions = [f"What is policy {rng.randrange(args.distinct)}?" for _ in range(args.queries)]
+
+    print(
+        f"{'mode':>22} {'seconds':>8} {'queries/s':>9} {'calls':>6} "
+        f"{'hit rate':>8} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    client = _client(args, cache_entries=0)
+    start = time.perf_counter()
+    sequential = [client.query(q, max_results=args.max_results) for q in questions]
+    _row("sequential, no cache", time.perf_counter() - start, client, len(questions))
+
+    client = _client(args, cache_entries=0)
+    start = time.perf_counter()
+    fanned = client.query_many(questions, args.max_results, max_concurrency=args.concurrency)
+    _row("query_many, no cache", time.perf_counter() - start, client, len(questions))
+    assert [[r.content for r in rs] for rs in fanned] == [
+        [r.content for r in rs] for rs in sequential
+    ], "query_many must return results in input order"
+
+    client = _client(args, cache_entries=1024)
+    start = time.perf_counter()
+    client.query_many(questions, args.max_results, max_concurrency=args.concurrency)
+    _row("query_many, cold cache", time.perf_counter() - start, client, len(questions))
+    start = time.perf_counter()
+    client.query_many(questions, args.max_results, max_concurrency=args.concurrency)
+    _row("query_many, warm cache", time.perf_counter() - start, client, len(questions))
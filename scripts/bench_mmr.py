@@ -0,0 +1,91 @@
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from src.mmr import mmr_select
+
+
+def _clustered(pool: int, dim: int, clusters: int, rng: np.random.Generator):
+    """Candidates in a few tight clusters, like near-identical passages of one section."""
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=pool)
+    candidates = centers[labels] + 0.05 * rng.normal(size=(pool, dim)).astype(np.float32)
+    query = centers[0] + 0.5 * rng.normal(size=dim).astype(np.float32)
+    return query, candidates
+
+
+def _redundancy(candidates: np.ndarray, picks) -> float:
+    chosen = candidates[list(picks)]
+    chosen = chosen / np.linalg.norm(chosen, axis=1, keepdims=True)
+    sims = chosen @ chosen.T
+    upper = sims[np.triu_indices(len(picks), k=1)]
+    return float(upper.mean()) if upper.size else 0.0
+
+
+def _timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def _fetch_cost(sizes, top_k: int, repeat: int) -> None:
+    from src.vector_store import VectorStore
+
+    store = VectorStore()
+    with store._cursor() as cur:
+        cur.execute("SELECT embedding FROM documents LIMIT 1;")
+        row = cur.fetchone()
+    if row is None:
+        print("documents table is empty; skipping the Postgres fetch comparison.")
+        return
+    query = [float(x) for x in row[0].to_numpy()]
+    print("\nPostgres over-fetch (vectors returned with rows):")
+    print(f"{'fetch_k':>8} {'top-k only p50':>16} {'with vectors p50':>18}")
+    plain = _timed(lambda: store.similarity_search(query, top_k, None), repeat)[0]
+    for size in sizes:
+        fetched = _timed(
+            lambda: store.similarity_search(query, size, None, with_vectors=True), repeat
+        )[0]
+        print(f"{size:>8} {plain * 1000:>14.2f}ms {fetched * 1000:>16.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure MMR latency vs. candidate pool size.")
+    parser.add_argument("--pools", default="10,20,40,80,160,320,640")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--clusters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--postgres", action="store_true", help="Also time fetching candidates with vectors"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sizes = [int(x) for x in args.pools.split(",")]
+    print(f"dim={args.dim} top_k={args.top_k} lambda={args.lambda_mult}")
+    print(
+        f"{'pool':>6} {'p50':>10} {'p95':>10} "
+        f"{'top-k redundancy':>18} {'mmr redundancy':>16}"
+    )
+    for size in sizes:
+        query, candidates = _clustered(size, args.dim, args.clusters, rng)
+        p50, p95 = _timed(
+            lambda: mmr_select(query, candidates, args.top_k, args.lambda_mult), args.repeat
+        )
+        relevance = (candidates / np.linalg.norm(candidates, axis=1, keepdims=True)) @ query
+        top = np.argsort(-relevance)[: args.top_k]
+        picks = mmr_select(query, candidates, args.top_k, args.lambda_mult)
+        print(
+            f"{size:>6} {p50 * 1e6:>8.0f}us {p95 * 1e6:>8.0f}us "
+            f"{_redundancy(candidates, top):>18.3f} {_redundancy(candidates, picks):>16.3f}"
+        )
+    if args.postgres:
+        _fetch_cost(sizes, args.top_k, max(5, args.repeat // 20))
@@ -0,0 +1,130 @@
+import argparse
+import statistics
+import time
+
+import numpy as np
+from pgvector import Vector
+
+from src.db_pool import ConnectionPool
+from src.vector_store import (
+    INDEX_NAME,
+    QUANTIZATIONS,
+    VectorStore,
+    _candidate_source,
+    search_params,
+)
+
+SCHEMA = "bench_quantization"
+
+
+def _corpus(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors around a few hundred topics, closer to real embeddings than pure noise."""
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _open_store(dim: int) -> VectorStore:
+    pool = ConnectionPool(minconn=1, maxconn=2, options=f"-c search_path={SCHEMA},public")
+    store = VectorStore(pool=pool)
+    with store._cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        cur.execute(f"CREATE SCHEMA {SCHEMA};")
+    store.ensure_schema(embedding_dim=dim)
+    with store._cursor() as cur:
+        # Load without an index; each mode builds its own below.
+        cur.execute(f"DROP INDEX IF EXISTS {INDEX_NAME};")
+    return store
+
+
+def _search(store: VectorStore, state: dict, query: np.ndarray, top_k: int, shortlist: int):
+    """Run the store's coarse-then-rerank SQL with an explicit shortlist size."""
+    with store._cursor() as cur:
+        for name, value in search_params(state["type"], state["lists"], shortlist).items():
+            cur.execute(f"SET LOCAL {name} = {int(value)};")
+        start = time.perf_counter()
+        cur.execute(
+            f"""
+            SELECT id FROM {_candidate_source(state)}
+            ORDER BY embedding <=> %(embedding)s
+            LIMIT %(top_k)s;
+            """,
+            {"embedding": Vector(query), "top_k": top_k, "shortlist": shortlist},
+        )
+        ids = [row[0] for row in cur.fetchall()]
+        return ids, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Index size vs. recall for full, halfvec and binary-quantized indexes."
+    )
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--factors", default="1,2,4,8,16", help="Re-rank shortlist multipliers")
+    parser.add_argument("--modes", default=",".join(QUANTIZATIONS))
+    parser.add_argument("--type", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = _corpus(args.rows, args.dim, args.clusters, rng)
+    queries = _corpus(args.queries, args.dim, args.clusters, np.random.default_rng(1))
+
+    store = _open_store(args.dim)
+    start = time.perf_counter()
+    store.add_documents(
+        (f"row {i}" for i in range(args.rows)),
+        ({"source": f"bench/{i // 100}.txt"} for i in range(args.rows)),
+        vectors,
+    )
+    print(f"loaded {args.rows} x {args.dim} rows in {time.perf_counter() - start:.1f}s")
+    with store._cursor() as cur:
+        cur.execute("SELECT id FROM documents ORDER BY id;")
+        ids = np.array([row[0] for row in cur.fetchall()])
+        cur.execute("SELECT pg_table_size('documents');")
+        (table_bytes,) = cur.fetchone()
+    print(f"table (full-precision vectors, kept for re-ranking): {table_bytes / 2**20:.1f} MiB")
+    truth = [set(ids[np.argsort(-(vectors @ q))[: args.top_k]]) for q in queries]
+
+    factors = [int(x) for x in args.factors.split(",")]
+    baseline_bytes = None
+    print(
+        f"\n{'mode':>8} {'index MiB':>10} {'saved':>7} {'build s':>8} "
+        f"{'shortlist':>10} {'recall@' + str(args.top_k):>10} {'p50 ms':>8}"
+    )
+    for mode in args.modes.split(","):
+        start = time.perf_counter()
+        try:
+            info = store.build_index(args.type, quantization=mode)
+        except RuntimeError as exc:
+            print(f"{mode:>8} skipped: {exc}")
+            continue
+        build = time.perf_counter() - start
+        # build_index just read the new index's state; keep it for every query below.
+        state = VectorStore.cached_index_state()
+        size = info["size_bytes"]
+        if mode == "none":
+            baseline_bytes = size
+        saved = f"{1 - size / baseline_bytes:.0%}" if baseline_bytes else "-"
+        for factor in factors if mode != "none" else [1]:
+            shortlist = args.top_k * factor
+            hits, latencies = 0, []
+            for query, expected in zip(queries, truth):
+                found, seconds = _search(store, state, query, args.top_k, shortlist)
+                hits += len(expected & set(found))
+                latencies.append(seconds)
+            recall = hits / (len(queries) * args.top_k)
+            print(
+                f"{mode:>8} {size / 2**20:>10.1f} {saved:>7} {build:>8.1f} "
+                f"{shortlist:>10} {recall:>10.3f} {statistics.median(latencies) * 1000:>8.2f}"
+            )
+
+    if not args.keep:
+        with store._cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+    store.pool.closeall()
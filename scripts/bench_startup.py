@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET_FILE = Path(__file__).with_name("startup_budget.json")
+
+_PROBE = "import sys, {target}; print(','.join(sorted(sys.modules)))"
+
+
+def _measure(target: str) -> tuple:
+    """Cumulative import time (ms) of target, its imports (ms, name) and loaded modules."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(target=target)],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        entries.append((int(cumulative) / 1000, name[1:]))
+    total = 0.0
+    imports = []
+    for i, (ms, name) in enumerate(entries):
+        if name == target:
+            total = ms
+            # Children are printed before their parent, indented below it.
+            j = i - 1
+            while j >= 0 and entries[j][1].startswith("  "):
+                imports.append((entries[j][0], entries[j][1].strip()))
+                j -= 1
+            break
+    modules = set(proc.stdout.strip().split(","))
+    return total, imports, modules
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure entry-point import time with -X importtime against a budget."
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per target (median is used)")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports to list")
+    parser.add_argument("--budget", default=str(BUDGET_FILE), help="Budget JSON file")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    budget = json.loads(Path(args.budget).read_text())
+    results = {}
+    failures = []
+    for target, limits in budget["targets"].items():
+        samples = []
+        imports, modules = [], set()
+        for _ in range(max(1, args.runs)):
+            total, imports, modules = _measure(target)
+            samples.append(total)
+        median = statistics.median(samples)
+        loaded = sorted(name for name in limits.get("forbidden", []) if name in modules)
+        heaviest = sorted(imports, reverse=True)[: args.top]
+        results[target] = {
+            "median_ms": round(median, 1),
+            "budget_ms": limits["budget_ms"],
+            "forbidden_loaded": loaded,
+            "heaviest": [{"module": name, "ms": round(ms, 1)} for ms, name in heaviest],
+        }
+        if median > limits["budget_ms"]:
+            failures.append(f"{target}: {median:.0f}ms exceeds {limits['budget_ms']}ms")
+        if loaded:
+            failures.append(f"{target}: eagerly imports {', '.join(loaded)}")
+
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2))
+    else:
+        for target, result in results.items():
+            print(f"{target}: {result['median_ms']:.0f}ms (budget {result['budget_ms']}ms)")
+            for item in result["heaviest"]:
+                print(f"    {item['ms']:8.1f}ms  {item['module']}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,95 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bedrock_control import BedrockController, CircuitOpenError
+from src.embeddings import EmbeddingsManager
+from src.fakes import FakeBedrockClient
+
+
+def _embed_all(manager: EmbeddingsManager, texts, workers: int):
+    """Embed one text per request from `workers` threads; returns (seconds, failures)."""
+
+    def run(text):
+        try:
+            manager.embed_text(text)
+            return 0
+        except Exception:
+            return 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        failed = sum(pool.map(run, texts))
+    return time.perf_counter() - start, failed
+
+
+def _row(label: str, texts: int, seconds: float, failed: int, client, state: dict) -> None:
+    print(
+        f"{label:>12} {seconds:>8.2f} {(texts - failed) / seconds:>9.1f} {failed:>7} "
+        f"{client.throttled:>9} {state['retries']:>8} {state['concurrency_limit']:>6} "
+        f"{client.max_in_flight:>8}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Embed through a fake Bedrock that throttles, with and without the controller."
+    )
+    parser.add_argument("--texts", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--capacity", type=int, default=6, help="Server-side concurrent requests")
+    parser.add_argument("--rate", type=float, default=0, help="Server-side requests/second")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    texts = [f"policy passage {i}" for i in range(args.texts)]
+    print(
+        f"{'mode':>12} {'seconds':>8} {'texts/s':>9} {'failed':>7} "
+        f"{'throttled':>9} {'retries':>8} {'limit':>6} {'peak srv':>8}"
+    )
+    modes = {
+        # No client-side control: every throttle fails the request.
+        "none": dict(max_concurrency=args.workers, max_retries=0, failure_threshold=10**9),
+        "retry only": dict(
+            max_concurrency=args.workers, decrease_factor=1.0, failure_threshold=10**9
+        ),
+        "controller": dict(max_concurrency=args.workers, failure_threshold=10**9),
+    }
+    for label, options in modes.items():
+        client = FakeBedrockClient(
+            dim=64,
+            latency=args.latency,
+            capacity=args.capacity,
+            rate=args.rate,
+            throttle_rate=args.throttle_rate,
+        )
+        controller = BedrockController(rate_limits={}, backoff_base=0.05, backoff_max=2, **options)
+        manager = EmbeddingsManager(cache=False, client=client, controller=controller)
+        seconds, failed = _embed_all(manager, texts, args.workers)
+        _row(label, len(texts), seconds, failed, client, controller.snapshot()[manager.model_id])
+
+    # Circuit breaker: a full outage fails fast instead of retrying every call.
+    client = FakeBedrockClient(dim=64, latency=args.latency)
+    controller = BedrockController(
+        rate_limits={}, backoff_base=0.01, backoff_max=0.05, failure_threshold=5, cooldown=0.5
+    )
+    manager = EmbeddingsManager(cache=False, client=client, controller=controller)
+    client.outage = True
+    rejected = 0
+    for text in texts[:50]:
+        try:
+            manager.embed_text(text)
+        except CircuitOpenError:
+            rejected += 1
+        except Exception:
+            pass
+    state = controller.snapshot()[manager.model_id]
+    print(
+        f"\noutage: {client.requests} requests reached the service for 50 calls, "
+        f"{rejected} rejected by the open circuit (state={state['state']})"
+    )
+    client.outage = False
+    time.sleep(0.6)
+    manager.embed_text("probe")
+    print(f"after cooldown: state={controller.snapshot()[manager.model_id]['state']}")
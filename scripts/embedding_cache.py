@@ -0,0 +1,43 @@
+import argparse
+import json
+
+from config import settings
+from src.document_loader import load_from_directory
+from src.embedding_cache import EmbeddingCache
+from src.embeddings import EmbeddingsManager, EmbeddingStats
+from src.utils import chunk_documents
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, prune or warm the embedding cache.")
+    parser.add_argument("--path", default=None, help="Cache file (defaults to EMBEDDING_CACHE_PATH).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entry counts and size.")
+    prune = sub.add_parser("prune", help="Evict least recently used entries.")
+    prune.add_argument(
+        "--max-entries",
+        type=int,
+        default=settings.embedding_cache_max_entries,
+        help="Number of entries to keep.",
+    )
+    sub.add_parser("clear", help="Delete every cached embedding.")
+    warm = sub.add_parser("warm", help="Embed a directory's chunks into the cache.")
+    warm.add_argument("--data-dir", required=True, help="Directory containing documents.")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(path=args.path)
+    if args.command == "prune":
+        removed = cache.prune(args.max_entries)
+        print(f"Evicted {removed} entries.")
+    elif args.command == "clear":
+        cache.clear()
+        print("Cache cleared.")
+    elif args.command == "warm":
+        documents = load_from_directory(args.data_dir)
+        texts, _ = chunk_documents(documents)
+        embeddings_manager = EmbeddingsManager(cache=cache)
+        stats = EmbeddingStats()
+        embeddings_manager.embed_texts(texts, stats=stats)
+        print(f"Embedded {embeddings_manager.timing_summary(stats)}")
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
@@ -0,0 +1,18 @@
+import argparse
+import time
+
+from config import settings
+from src.numpy_store import export_from_postgres
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Snapshot the pgvector documents table into a NumPy index directory."
+    )
+    parser.add_argument("--out-dir", default=settings.numpy_store_dir, help="Target directory.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows fetched per round trip.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = export_from_postgres(args.out_dir, batch_size=args.batch_size)
+    print(f"Exported {count} chunks to {args.out_dir} in {time.perf_counter() - start:.1f}s.")
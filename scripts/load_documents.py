@@ -1,7 +1,7 @@
 import argparse
 
 from src.document_loader import load_from_directory
-from src.embeddings import EmbeddingsManager
+from src.embeddings import EmbeddingsManager, EmbeddingStats
 from src.utils import chunk_documents
 from src.vector_store import VectorStore
 
@@ -22,12 +22,17 @@ if __name__ == "__main__":
         raise SystemExit("No documents loaded.")
 
     embeddings_manager = EmbeddingsManager()
-    embeddings = [embeddings_manager.embed_text(text) for text in texts]
+    stats = EmbeddingStats()
+    embeddings = embeddings_manager.embed_texts(texts, stats=stats)
+    print(f"Embedded {embeddings_manager.timing_summary(stats)}")
 
     store = VectorStore()
     store.ensure_schema(embedding_dim=len(embeddings[0]))
     if args.reset:
         store.clear_documents()
     store.add_documents(texts, metadatas, embeddings)
+    index_action = store.maintain_index()
+    if index_action:
+        print(f"Vector index: {index_action}.")
     store.close()
     print(f"Ingested {len(texts)} chunks.")
@@ -0,0 +1,75 @@
+import argparse
+import json
+
+from config import settings
+from src.vector_store import QUANTIZATIONS, VectorStore
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the documents ANN index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show index type, size, validity and search settings.")
+    rebuild = sub.add_parser("rebuild", help="Rebuild the index sized to the current rows.")
+    quantize = sub.add_parser(
+        "quantize",
+        help="Migrate the index to halfvec / binary vectors (or back to none) and report "
+        "the size change. Table rows keep full precision for re-ranking.",
+    )
+    quantize.add_argument("mode", choices=QUANTIZATIONS)
+    partial = sub.add_parser(
+        "partial",
+        help="Build (or --drop) an ANN index over one department or doc_type, "
+        "used by searches filtered on exactly that value.",
+    )
+    partial.add_argument("column", choices=["department", "doc_type"])
+    partial.add_argument("value")
+    partial.add_argument("--drop", action="store_true")
+    for command in (rebuild, quantize):
+        command.add_argument(
+            "--type",
+            choices=["hnsw", "ivfflat"],
+            default=settings.vector_index_type,
+            help="Index type to build.",
+        )
+        command.add_argument(
+            "--blocking",
+            action="store_true",
+            help="Drop and rebuild in one transaction instead of building concurrently.",
+        )
+    rebuild.add_argument(
+        "--quantization",
+        choices=QUANTIZATIONS,
+        default=settings.vector_quantization,
+        help="What the index stores (default: VECTOR_QUANTIZATION).",
+    )
+    args = parser.parse_args()
+
+    store = VectorStore()
+    if args.command == "rebuild":
+        info = store.build_index(
+            args.type, concurrently=not args.blocking, quantization=args.quantization
+        )
+    elif args.command == "partial":
+        if args.drop:
+            dropped = store.drop_partial_index(args.column, args.value)
+            info = {"dropped": dropped, "column": args.column, "value": args.value}
+        else:
+            info = store.build_partial_index(args.column, args.value)
+    elif args.command == "quantize":
+        before = store.index_info()
+        info = store.build_index(args.type, concurrently=not args.blocking, quantization=args.mode)
+        if before:
+            info["previous"] = {
+                "quantization": before["quantization"],
+                "size_bytes": before["size_bytes"],
+            }
+            info["size_change_bytes"] = info["size_bytes"] - before["size_bytes"]
+        if args.mode != settings.vector_quantization:
+            print(
+                f"Note: set VECTOR_QUANTIZATION={args.mode} so maintain_index() keeps this "
+                "mode after the next ingest."
+            )
+    else:
+        info = store.index_info()
+    print(json.dumps(info, indent=2, default=str) if info else "No vector index found.")
+    store.close()
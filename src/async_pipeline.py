@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Sequence, Tuple
+
+from config import settings
+from src.embeddings import EmbeddingsManager
+from src.llm import BedrockLLM
+from src.context_builder import assemble_context
+from src.query_cache import get_query_caches
+from src.rag_pipeline import PROMPT_TEMPLATE
+from src.vector_store import (
+    INDEX_NAME,
+    INDEX_STATE_SQL,
+    VectorStore,
+    parse_rows,
+    search_settings,
+    similarity_statement,
+)
+
+
+def _positional(sql: str, params: Dict) -> Tuple[str, list]:
+    """Rewrite psycopg2 %(name)s placeholders as asyncpg $n ones."""
+    names: List[str] = []
+
+    def number(match: re.Match) -> str:
+        if match.group(1) not in names:
+            names.append(match.group(1))
+        return f"${names.index(match.group(1)) + 1}"
+
+    return re.sub(r"%\((\w+)\)s", number, sql), [params[name] for name in names]
+
+
+class AsyncVectorStore:
+    def __init__(self, min_size: int | None = None, max_size: int | None = None) -> None:
+        self.min_size = settings.db_pool_min if min_size is None else min_size
+        self.max_size = settings.db_pool_max if max_size is None else max_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    try:
+                        import asyncpg
+                        from pgvector.asyncpg import register_vector
+                    except Exception as exc:  # pragma: no cover - optional dependency
+                        raise RuntimeError(
+                            "asyncpg is required for AsyncVectorStore. Install it with pip."
+                        ) from exc
+                    self._pool = await asyncpg.create_pool(
+                        host=settings.db_host,
+                        port=settings.db_port,
+                        database=settings.db_name,
+                        user=settings.db_user,
+                        password=settings.db_password,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        init=register_vector,
+                    )
+        return self._pool
+
+    async def acquire(self):
+        pool = await self._get_pool()
+        return await pool.acquire()
+
+    async def release(self, conn) -> None:
+        pool = await self._get_pool()
+        await pool.release(conn)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _index_state(self, conn) -> Dict:
+        # Shares VectorStore's cached view of the index, so both stores agree.
+        state = VectorStore.cached_index_state()
+        if state is None:
+            sql, args = _positional(INDEX_STATE_SQL, {"index": INDEX_NAME})
+            row = await conn.fetchrow(sql, *args)
+            state = VectorStore.remember_index_state(tuple(row) if row else None)
+        return state
+
+    async def corpus_version(self, conn) -> int:
+        import asyncpg
+
+        try:
+            version = await conn.fetchval("SELECT version FROM corpus_state WHERE id = 1;")
+        except asyncpg.UndefinedTableError:
+            # No ingest has run yet, so there is nothing cached answers could go stale on.
+            return 0
+        return version or 0
+
+    async def similarity_search(
+        self, query_embedding: Sequence[float], top_k: int, conn=None
+    ) -> List[Tuple[str, dict, float]]:
+        """Unfiltered top-k search; runs the same statement as VectorStore.similarity_search."""
+        if not len(query_embedding):
+            return []
+        owned = conn is None
+        if owned:
+            conn = await self.acquire()
+        try:
+            async with conn.transaction():
+                state = await self._index_state(conn)
+                for name, value in search_settings(state, top_k).items():
+                    await conn.execute(f"SET LOCAL {name} = {value};")
+                sql, params = similarity_statement(state, top_k)
+                sql, args = _positional(sql, {**params, "embedding": list(query_embedding)})
+                rows = await conn.fetch(sql, *args)
+        finally:
+            if owned:
+                await self.release(conn)
+        return parse_rows(tuple(row) for row in rows)
+
+
+def _apply_threshold(results: List[tuple], threshold: float | None) -> List[tuple]:
+    # Same outcome as the sync pipeline's thresholded search with unfiltered
+    # fallback, but from a single round trip.
+    if threshold is None or threshold < 0:
+        return results
+    above = [r for r in results if r[2] >= threshold]
+    return above or results
+
+
+def _unsupported_settings(custom_store: bool) -> List[str]:
+    unsupported = []
+    if not custom_store and settings.vector_backend != "postgres":
+        unsupported.append(f"VECTOR_BACKEND={settings.vector_backend}")
+    if settings.retrieval_mode != "vector":
+        unsupported.append(f"RETRIEVAL_MODE={settings.retrieval_mode}")
+    if settings.mmr_enabled:
+        unsupported.append("MMR_ENABLED=true")
+    return unsupported
+
+
+class AsyncRAGPipeline:
+    """Concurrent unscoped questions over pgvector (asyncpg) and Bedrock.
+
+    Retrieval runs the same search statement and index settings as
+    RAGPipeline and shares its query and answer caches. Hybrid retrieval,
+    MMR and the NumPy backend are only implemented by RAGPipeline, so those
+    settings are rejected here rather than silently ignored.
+    """
+
+    def __init__(
+        self,
+        embeddings: EmbeddingsManager | None = None,
+        llm: BedrockLLM | None = None,
+        store: AsyncVectorStore | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        unsupported = _unsupported_settings(custom_store=store is not None)
+        if unsupported:
+            raise ValueError(
+                f"AsyncRAGPipeline does not support {', '.join(unsupported)}; "
+                "use RAGPipeline for these settings"
+            )
+        self.embeddings = embeddings or EmbeddingsManager()
+        self.llm = llm or BedrockLLM()
+        self.store = store or AsyncVectorStore()
+        self.query_cache, self.answer_cache = get_query_caches()
+        # boto3 has no asyncio API; Bedrock calls run on a dedicated thread pool
+        # so they never block the event loop.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.bedrock_max_concurrency
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def _embed_query(self, question: str) -> List[float]:
+        query_embedding = self.query_cache.get(question)
+        if query_embedding is None:
+            query_embedding = await self._run(self.embeddings.embed_text, question, is_query=True)
+            self.query_cache.put(question, query_embedding)
+        return query_embedding
+
+    async def _retrieve(self, question: str) -> Tuple[List[float], Dict | None, int, List[tuple]]:
+        """(query embedding, cached answer, corpus version, results); no search on a hit."""
+        # Check out a DB connection while the query embedding is in flight.
+        conn_task = asyncio.ensure_future(self.store.acquire())
+        try:
+            query_embedding = await self._embed_query(question)
+            conn = await conn_task
+        except BaseException:
+            if conn_task.done() and not conn_task.cancelled() and not conn_task.exception():
+                await self.store.release(conn_task.result())
+            else:
+                conn_task.cancel()
+            raise
+        try:
+            cached, corpus_version = None, 0
+            if self.answer_cache.max_entries > 0:
+                corpus_version = await self.store.corpus_version(conn)
+                cached = self.answer_cache.get(query_embedding, corpus_version)
+            if cached is not None:
+                return query_embedding, cached, corpus_version, []
+            results = await self.store.similarity_search(
+                query_embedding, settings.similarity_top_k, conn=conn
+            )
+        finally:
+            await self.store.release(conn)
+        results = _apply_threshold(results, settings.similarity_threshold)
+        return query_embedding, None, corpus_version, results
+
+    async def answer_query(self, question: str) -> Dict:
+        query_embedding, cached, corpus_version, results = await self._retrieve(question)
+        if cached is not None:
+            return {**cached, "cached": True}
+        context, report = assemble_context(results)
+        prompt = PROMPT_TEMPLATE.format(question=question, context=context)
+        usage: Dict = {}
+        answer = await self._run(self.llm.generate, prompt, usage=usage)
+        sources = [r[1] for r in results]
+        self.answer_cache.put(query_embedding, answer, sources, corpus_version)
+        return {
+            "answer": answer,
+            "sources": sources,
+            "usage": usage,
+            "context": report.as_dict(),
+        }
+
+    async def answer_many(self, questions: Sequence[str]) -> List[Dict]:
+        return list(await asyncio.gather(*(self.answer_query(q) for q in questions)))
+
+    async def close(self) -> None:
+        await self.store.close()
+        self._executor.shutdown(wait=False)
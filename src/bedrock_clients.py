@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from config import settings
+
+RUNTIME = "bedrock-runtime"
+AGENT_RUNTIME = "bedrock-agent-runtime"
+
+_clients: Dict[Tuple[str, str, str | None], object] = {}
+_lock = threading.Lock()
+
+
+def client_config(service_name: str):
+    """botocore Config with the pool size, keep-alive and timeouts from settings."""
+    from botocore.config import Config
+
+    # bedrock-runtime calls are retried by src.bedrock_control; a second
+    # retry layer underneath would multiply attempts during a throttle storm.
+    retries = {"mode": "standard", "max_attempts": 1 if service_name == RUNTIME else 3}
+    return Config(
+        max_pool_connections=settings.bedrock_max_pool_connections,
+        tcp_keepalive=settings.bedrock_tcp_keepalive,
+        connect_timeout=settings.bedrock_connect_timeout,
+        read_timeout=settings.bedrock_read_timeout,
+        retries=retries,
+    )
+
+
+def _create(service_name: str, region_name: str, profile_name: str | None):
+    import boto3
+
+    # Sessions are not thread-safe but the clients they create are, so each
+    # client gets its own session and is then shared freely.
+    if profile_name:
+        session = boto3.Session(profile_name=profile_name, region_name=region_name)
+    else:
+        session = boto3.Session(
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_access_key,
+            region_name=region_name,
+        )
+    return session.client(service_name=service_name, config=client_config(service_name))
+
+
+def get_client(
+    service_name: str = RUNTIME, region_name: str | None = None, profile_name: str | None = None
+):
+    """Process-wide boto3 client for (service, region, profile), created once."""
+    key = (service_name, region_name or settings.aws_region, profile_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _create(*key)
+                _clients[key] = client
+    return client
+
+
+def registered() -> list:
+    with _lock:
+        return [
+            {"service": service, "region": region, "profile": profile}
+            for service, region, profile in _clients
+        ]
+
+
+def reset_clients() -> None:
+    with _lock:
+        _clients.clear()
+
+
+def warmup(
+    services: Iterable[str] = (RUNTIME, AGENT_RUNTIME), probe: bool = True
+) -> Dict[str, float]:
+    """Create clients (credentials, endpoint resolution) before the first request.
+
+    With probe, one short query embedding is also sent so a TLS connection is
+    already open in the pool. Returns seconds per step.
+    """
+    timings: Dict[str, float] = {}
+    for service in services:
+        start = time.perf_counter()
+        # Client creation resolves credentials and the endpoint.
+        get_client(service)
+        timings[service] = time.perf_counter() - start
+    if probe and RUNTIME in services:
+        from src.bedrock_control import get_controller
+
+        # Sent straight to the client: through EmbeddingsManager the on-disk
+        # cache would answer it on every start after the first.
+        model_id = settings.embeddings_model
+        if "cohere.embed" in model_id:
+            body = {"texts": ["warmup"], "input_type": "search_query"}
+        else:
+            body = {"inputText": "warmup"}
+        start = time.perf_counter()
+        response = get_controller().call(
+            model_id,
+            get_client(RUNTIME).invoke_model,
+            modelId=model_id,
+            body=json.dumps(body),
+            accept="application/json",
+            contentType="application/json",
+        )
+        response["body"].read()
+        timings["probe"] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, Dict, TypeVar
+
+from config import settings
+from src.metrics import get_metrics
+
+T = TypeVar("T")
+
+# Bedrock error codes that mean "slow down": back off and shrink concurrency.
+THROTTLE_CODES = frozenset(
+    {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+)
+# Transient service-side failures: retried, and counted toward the breaker.
+RETRYABLE_CODES = frozenset(
+    {
+        "ServiceUnavailableException",
+        "InternalServerException",
+        "ModelNotReadyException",
+        "ModelTimeoutException",
+        "EndpointConnectionError",
+        "ConnectTimeoutError",
+        "ReadTimeoutError",
+        "ConnectionClosedError",
+    }
+)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling Bedrock while a model's circuit breaker is open."""
+
+
+def error_code(exc: BaseException) -> str:
+    """botocore ClientError code, else the exception class name."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        code = (response.get("Error") or {}).get("Code")
+        if code:
+            return str(code)
+    return type(exc).__name__
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """"model-a=20,model-b=2.5" -> {"model-a": 20.0, "model-b": 2.5}."""
+    limits: Dict[str, float] = {}
+    for item in spec.split(","):
+        model, sep, rate = item.strip().rpartition("=")
+        if sep and model:
+            limits[model.strip()] = float(rate)
+    return limits
+
+
+class TokenBucket:
+    """Requests per second with a burst allowance; rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, burst or rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is due; returns the seconds waited.
+
+        Tokens may go negative: each caller reserves the next free slot, so
+        waiters are served in arrival order without polling.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def available(self) -> float:
+        if self.rate <= 0:
+            return float("inf")
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self.tokens + elapsed * self.rate)
+
+
+class ModelController:
+    """Rate limit, AIMD concurrency limit, retries and circuit breaker for one model.
+
+    The concurrency limit starts at max_concurrency, grows by about one slot
+    per limit's worth of successful calls and is multiplied by
+    decrease_factor on a throttle. Calls that were already in flight when
+    the limit was cut do not cut it again, so one burst of throttles counts
+    as one congestion signal.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        rate: float = 0.0,
+        burst: float | None = None,
+        max_concurrency: int | None = None,
+        min_concurrency: int | None = None,
+        decrease_factor: float | None = None,
+        max_retries: int | None = None,
+        backoff_base: float | None = None,
+        backoff_max: float | None = None,
+        failure_threshold: int | None = None,
+        cooldown: float | None = None,
+    ) -> None:
+        self.model_id = model_id
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max(1, max_concurrency or settings.bedrock_max_concurrency)
+        self.min_concurrency = max(
+            1, min(min_concurrency or settings.bedrock_min_concurrency, self.max_concurrency)
+        )
+        self.decrease_factor = (
+            settings.bedrock_decrease_factor if decrease_factor is None else decrease_factor
+        )
+        self.max_retries = settings.bedrock_max_retries if max_retries is None else max_retries
+        self.backoff_base = settings.bedrock_backoff_base if backoff_base is None else backoff_base
+        self.backoff_max = settings.bedrock_backoff_max if backoff_max is None else backoff_max
+        self.failure_threshold = (
+            settings.bedrock_circuit_failures if failure_threshold is None else failure_threshold
+        )
+        self.cooldown = settings.bedrock_circuit_cooldown if cooldown is None else cooldown
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.state = CLOSED
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.circuit_opens = 0
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._last_decrease = 0.0
+        self._last_throttle: float | None = None
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self.metrics = get_metrics()
+        self._publish()
+
+    def _publish(self) -> None:
+        self.metrics.gauge("bedrock_concurrency_limit", int(self.limit), model=self.model_id)
+        self.metrics.gauge("bedrock_in_flight", self.in_flight, model=self.model_id)
+        self.metrics.gauge(
+            "bedrock_circuit_state", _STATE_GAUGE[self.state], model=self.model_id
+        )
+
+    def _admit(self) -> float:
+        """Wait for a concurrency slot; returns the monotonic start time."""
+        with self._cond:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+                self.rejected += 1
+                self.metrics.inc("bedrock_circuit_rejected_total", model=self.model_id)
+                raise CircuitOpenError(
+                    f"Bedrock circuit open for {self.model_id} after "
+                    f"{self._consecutive_failures} consecutive failures"
+                )
+            if self.state == HALF_OPEN:
+                # One probe call decides whether the breaker closes again.
+                self._probing = True
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self._publish()
+            return time.monotonic()
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+            self._publish()
+
+    def _on_success(self) -> None:
+        with self._cond:
+            self.calls += 1
+            self._consecutive_failures = 0
+            self._probing = False
+            self.state = CLOSED
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+            self._publish()
+
+    def _on_failure(self, started: float, throttled: bool, final: bool) -> None:
+        with self._cond:
+            if throttled:
+                self.throttles += 1
+                self._last_throttle = time.monotonic()
+                if started >= self._last_decrease:
+                    self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+                    self._last_decrease = time.monotonic()
+            if final:
+                self.failures += 1
+            # Throttles are handled by the limit; they only trip the breaker
+            # when retries run out or a half-open probe is throttled.
+            if not throttled or final or self.state == HALF_OPEN:
+                self._record_failure()
+            else:
+                self._publish()
+
+    def _record_failure(self) -> None:
+        # Caller holds self._cond.
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.circuit_opens += 1
+                self.metrics.inc("bedrock_circuit_opened_total", model=self.model_id)
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+        self._publish()
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform over [0, exponential cap] spreads retries out.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn under the rate limit and concurrency limit, retrying throttles
+        and transient errors with jittered backoff."""
+        attempt = self._local.retries = 0
+        while True:
+            waited = self.bucket.acquire()
+            start = time.perf_counter()
+            started = self._admit()
+            waited += time.perf_counter() - start
+            if waited > 0.001:
+                self.metrics.observe("bedrock_throttle_wait_seconds", waited, model=self.model_id)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                code = error_code(exc)
+                throttled = code in THROTTLE_CODES
+                if throttled:
+                    self.metrics.inc("bedrock_throttles_total", model=self.model_id)
+                if not throttled and code not in RETRYABLE_CODES:
+                    # Validation / access errors are the caller's problem, not the service's.
+                    with self._cond:
+                        self._probing = False
+                        self.failures += 1
+                    self._release()
+                    raise
+                final = attempt >= self.max_retries
+                self._on_failure(started, throttled, final)
+                self._release()
+                if final or self.state == OPEN:
+                    raise
+                attempt = self._local.retries = attempt + 1
+                with self._cond:
+                    self.retries += 1
+                time.sleep(self._backoff(attempt))
+                continue
+            self._on_success()
+            self._release()
+            return result
+
+    @property
+    def last_retries(self) -> int:
+        """Retries made by this thread's most recent call()."""
+        return getattr(self._local, "retries", 0)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                "model": self.model_id,
+                "state": self.state,
+                "concurrency_limit": int(self.limit),
+                "concurrency_limit_exact": round(self.limit, 3),
+                "in_flight": self.in_flight,
+                "rate_per_second": self.bucket.rate or None,
+                "tokens_available": round(self.bucket.available(), 3)
+                if self.bucket.rate > 0
+                else None,
+                "calls": self.calls,
+                "throttles": self.throttles,
+                "retries": self.retries,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "circuit_opens": self.circuit_opens,
+                "consecutive_failures": self._consecutive_failures,
+                "seconds_since_throttle": round(time.monotonic() - self._last_throttle, 3)
+                if self._last_throttle is not None
+                else None,
+            }
+
+
+class BedrockController:
+    """Per-model ModelControllers shared by every Bedrock caller in the process."""
+
+    def __init__(self, rate_limits: Dict[str, float] | None = None, **options) -> None:
+        self.rate_limits = (
+            parse_rate_limits(settings.bedrock_rate_limits) if rate_limits is None else rate_limits
+        )
+        self.options = options
+        self._models: Dict[str, ModelController] = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model_id: str) -> ModelController:
+        controller = self._models.get(model_id)
+        if controller is None:
+            with self._lock:
+                controller = self._models.get(model_id)
+                if controller is None:
+                    rate = self.rate_limits.get(model_id, settings.bedrock_rate_limit)
+                    options = {"burst": settings.bedrock_rate_burst or None, **self.options}
+                    controller = ModelController(model_id, rate=rate, **options)
+                    self._models[model_id] = controller
+        return controller
+
+    def call(self, model_id: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        return self.for_model(model_id).call(fn, *args, **kwargs)
+
+    def last_retries(self, model_id: str) -> int:
+        return self.for_model(model_id).last_retries
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            models = list(self._models.values())
+        return {controller.model_id: controller.snapshot() for controller in models}
+
+
+_controller: BedrockController | None = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> BedrockController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = BedrockController()
+    return _controller
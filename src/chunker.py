@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import bisect
+import re
+from itertools import accumulate, chain
+from dataclasses import dataclass
+from typing import Callable, List, Sequence, Tuple
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def token_length_function() -> Callable[[str], int]:
+    try:
+        import tiktoken
+    except Exception:  # pragma: no cover - optional dependency
+        return approximate_tokens
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class Chunk:
+    text: str
+    start: int
+    end: int
+    index: int
+
+
+class RecursiveChunker:
+    """Recursive character splitter that reports each chunk's offsets.
+
+    Splitting and merging follow LangChain's RecursiveCharacterTextSplitter
+    (separators kept at the start of the following piece, whitespace
+    stripped), so chunk texts match it. Because every piece is a contiguous
+    span of the input, the work is done on (start, end) offsets instead of
+    copied substrings.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Sequence[str] = DEFAULT_SEPARATORS,
+        length_function: Callable[[str], int] | None = None,
+    ) -> None:
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0 or chunk_overlap > chunk_size:
+            raise ValueError(
+                f"chunk_overlap must be between 0 and chunk_size, got {chunk_overlap}"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(separators)
+        self.length_function = length_function
+
+    def _lengths(self, text: str, pieces: List[tuple]) -> List[int]:
+        if self.length_function is None:
+            return [b - a for a, b in pieces]
+        return [self.length_function(text[a:b]) for a, b in pieces]
+
+    def _split(self, text: str, start: int, end: int, separators: Tuple[str, ...]) -> List[tuple]:
+        separator = separators[-1]
+        remaining: Tuple[str, ...] = ()
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[i + 1 :]
+                break
+
+        if separator:
+            # Each separator stays at the front of the piece that follows it.
+            parts = text[start:end].split(separator)
+            width = len(separator)
+            cuts = list(
+                accumulate(
+                    chain((len(parts[0]),), (width + len(part) for part in parts[1:])),
+                    initial=start,
+                )
+            )
+            pieces = list(zip(cuts, cuts[1:]))
+            if not parts[0]:
+                pieces = pieces[1:]
+        else:
+            pieces = [(i, i + 1) for i in range(start, end)]
+
+        spans: List[tuple] = []
+        good: List[tuple] = []
+        good_lengths: List[int] = []
+        for piece, length in zip(pieces, self._lengths(text, pieces)):
+            if length < self.chunk_size:
+                good.append(piece)
+                good_lengths.append(length)
+                continue
+            if good:
+                spans.extend(self._merge(text, good, good_lengths))
+                good, good_lengths = [], []
+            if remaining:
+                spans.extend(self._split(text, piece[0], piece[1], remaining))
+            else:
+                spans.append(piece)
+        if good:
+            spans.extend(self._merge(text, good, good_lengths))
+        return spans
+
+    def _strip(self, text: str, start: int, end: int) -> tuple | None:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if end > start else None
+
+    def _merge(self, text: str, pieces: List[tuple], lengths: List[int]) -> List[tuple]:
+        spans: List[tuple] = []
+        first = 0  # index of the oldest piece in the current window
+        total = 0
+        for i, length in enumerate(lengths):
+            if total + length > self.chunk_size and i > first:
+                span = self._strip(text, pieces[first][0], pieces[i - 1][1])
+                if span:
+                    spans.append(span)
+                while total > self.chunk_overlap or (
+                    total + length > self.chunk_size and total > 0
+                ):
+                    total -= lengths[first]
+                    first += 1
+            total += length
+        if first < len(pieces):
+            span = self._strip(text, pieces[first][0], pieces[-1][1])
+            if span:
+                spans.append(span)
+        return spans
+
+    def split(self, text: str) -> List[Chunk]:
+        spans = self._split(text, 0, len(text), self.separators)
+        return [Chunk(text[a:b], a, b, i) for i, (a, b) in enumerate(spans)]
+
+
+def page_for_offset(page_starts: Sequence[int], offset: int) -> int:
+    """1-based page number containing the character offset."""
+    return max(1, bisect.bisect_right(page_starts, offset))
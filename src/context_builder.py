@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from config import settings
+from src.chunker import token_length_function
+
+# Shortest suffix/prefix match treated as chunk overlap when offsets are missing.
+_MIN_TEXT_OVERLAP = 20
+# A passage is only trimmed to fit if at least this many tokens of it remain.
+_MIN_TRIMMED_TOKENS = 32
+
+_counter: Callable[[str], int] | None = None
+
+
+def count_tokens(text: str) -> int:
+    global _counter
+    if _counter is None:
+        _counter = token_length_function()
+    return _counter(text)
+
+
+@dataclass
+class Passage:
+    source: str
+    text: str
+    similarity: float
+    rank: int
+    start: int | None = None
+    end: int | None = None
+    last_index: int | None = None
+    aliases: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ContextReport:
+    chunks: int = 0
+    passages: int = 0
+    duplicates_removed: int = 0
+    chunks_merged: int = 0
+    passages_trimmed: int = 0
+    passages_dropped: int = 0
+    input_tokens: int = 0
+    context_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.input_tokens - self.context_tokens)
+
+    def as_dict(self) -> Dict:
+        return {**self.__dict__, "tokens_saved": self.tokens_saved}
+
+
+def build_context(results: List[tuple]) -> str:
+    """Every result verbatim, in order; the baseline assemble_context improves on."""
+    context_parts = []
+    for content, metadata, similarity in results:
+        source = metadata.get("source") if isinstance(metadata, dict) else metadata
+        context_parts.append(f"Source: {source}\nSimilarity: {similarity:.3f}\n{content}")
+    return "\n\n".join(context_parts)
+
+
+def _normalized(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is a prefix of right."""
+    limit = min(len(left), len(right), max(settings.chunk_overlap * 2, 200))
+    for size in range(limit, _MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge(left: Passage, right: Passage, index: int | None) -> bool:
+    """Append right to left if they are overlapping or adjacent; True if merged."""
+    if left.start is not None and right.start is not None:
+        adjacent = (
+            index is not None and left.last_index is not None and index == left.last_index + 1
+        )
+        if right.start > left.end and not adjacent:
+            return False
+        if right.start >= left.end:
+            left.text = f"{left.text}\n{right.text}"
+        elif right.end > left.end:
+            left.text += right.text[left.end - right.start :]
+        # Otherwise right lies inside left and adds nothing.
+        left.end = max(left.end, right.end)
+    else:
+        overlap = _text_overlap(left.text, right.text)
+        if not overlap:
+            return False
+        left.text += right.text[overlap:]
+    left.similarity = max(left.similarity, right.similarity)
+    left.rank = min(left.rank, right.rank)
+    left.last_index = index if index is not None else left.last_index
+    return True
+
+
+def _format(passage: Passage) -> str:
+    header = f"Source: {passage.source}"
+    if passage.aliases:
+        header += f" (also in: {', '.join(passage.aliases)})"
+    return f"{header}\nSimilarity: {passage.similarity:.3f}\n{passage.text}"
+
+
+def _trim(text: str, budget: int) -> str | None:
+    """Cut text at a whitespace boundary so it (with " ...") fits in budget tokens."""
+    marker = " ..."
+    tokens = count_tokens(text + marker)
+    while tokens > budget and text:
+        cut = max(1, int(len(text) * budget / tokens) - 1)
+        boundary = text.rfind(" ", 0, cut)
+        text = text[: boundary if boundary > 0 else cut].rstrip()
+        tokens = count_tokens(text + marker)
+    return text + marker if text else None
+
+
+def assemble_context(
+    results: Sequence[tuple], token_budget: int | None = None
+) -> Tuple[str, ContextReport]:
+    """Build the prompt context from (content, metadata, similarity) results.
+
+    Duplicate texts are dropped (their sources listed as aliases), overlapping
+    or adjacent chunks of one source are merged using the chunker's offsets
+    (or a suffix/prefix match for rows ingested without them), passages are
+    ordered by their best retrieval rank, and the result is cut to
+    token_budget tokens (0 = unlimited).
+    """
+    budget = settings.context_token_budget if token_budget is None else token_budget
+    report = ContextReport(chunks=len(results))
+    report.input_tokens = count_tokens(build_context(list(results)))
+
+    seen: Dict[str, Passage] = {}
+    by_source: Dict[str, List[Tuple[Passage, int | None]]] = {}
+    for rank, (content, metadata, similarity) in enumerate(results):
+        metadata = metadata if isinstance(metadata, dict) else {"source": metadata}
+        source = str(metadata.get("source"))
+        key = _normalized(content)
+        if key in seen:
+            report.duplicates_removed += 1
+            if source != seen[key].source and source not in seen[key].aliases:
+                seen[key].aliases.append(source)
+            continue
+        passage = Passage(
+            source=source,
+            text=content,
+            similarity=float(similarity),
+            rank=rank,
+            start=metadata.get("char_start"),
+            end=metadata.get("char_end"),
+            last_index=metadata.get("chunk_index"),
+            # Files whose identical chunks were skipped at ingest.
+            aliases=[a for a in metadata.get("aliases") or [] if a != source],
+        )
+        seen[key] = passage
+        by_source.setdefault(source, []).append((passage, metadata.get("chunk_index")))
+
+    passages: List[Passage] = []
+    for chunks in by_source.values():
+        # Document order, so neighbours sit next to each other.
+        chunks.sort(key=lambda item: (item[0].start is None, item[0].start or 0, item[0].rank))
+        current = None
+        for passage, index in chunks:
+            if current is not None and _merge(current, passage, index):
+                current.aliases.extend(a for a in passage.aliases if a not in current.aliases)
+                report.chunks_merged += 1
+                continue
+            current = passage
+            passages.append(current)
+    passages.sort(key=lambda p: p.rank)
+
+    # Drop passages whose text is contained in another one (across sources too),
+    # keeping the better rank.
+    kept: List[Passage] = []
+    for passage in passages:
+        if any(passage.text in other.text for other in kept):
+            report.duplicates_removed += 1
+            continue
+        contained = [other for other in kept if other.text in passage.text]
+        if contained:
+            passage.rank = min(other.rank for other in contained)
+            kept = [other for other in kept if other not in contained]
+            report.duplicates_removed += len(contained)
+        kept.append(passage)
+    kept.sort(key=lambda p: p.rank)
+
+    parts: List[str] = []
+    used = 0
+    for passage in kept:
+        block = _format(passage)
+        tokens = count_tokens(block) + (1 if parts else 0)
+        if budget <= 0 or used + tokens <= budget:
+            parts.append(block)
+            used += tokens
+            continue
+        available = budget - used - (1 if parts else 0)
+        header = count_tokens(_format(replace(passage, text="")))
+        if available - header >= _MIN_TRIMMED_TOKENS:
+            trimmed = _trim(passage.text, available - header)
+            if trimmed:
+                passage.text = trimmed
+                parts.append(_format(passage))
+                report.passages_trimmed += 1
+                used = budget
+                continue
+        report.passages_dropped += 1
+
+    context = "\n\n".join(parts)
+    report.passages = len(parts)
+    report.context_tokens = count_tokens(context)
+    return context, report
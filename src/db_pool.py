@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+import psycopg2
+from pgvector.psycopg2 import register_vector
+
+from config import settings
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        minconn: int | None = None,
+        maxconn: int | None = None,
+        timeout: float | None = None,
+        idle_timeout: float | None = None,
+        health_check_after: float | None = None,
+        **connect_kwargs,
+    ) -> None:
+        self.minconn = settings.db_pool_min if minconn is None else minconn
+        self.maxconn = max(1, settings.db_pool_max if maxconn is None else maxconn)
+        self.timeout = settings.db_pool_timeout if timeout is None else timeout
+        self.idle_timeout = (
+            settings.db_pool_idle_timeout if idle_timeout is None else idle_timeout
+        )
+        self.health_check_after = (
+            settings.db_pool_health_check_after
+            if health_check_after is None
+            else health_check_after
+        )
+        self.connect_kwargs = {
+            "host": settings.db_host,
+            "port": settings.db_port,
+            "dbname": settings.db_name,
+            "user": settings.db_user,
+            "password": settings.db_password,
+            **connect_kwargs,
+        }
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[object, float]] = []
+        self._total = 0
+        self._in_use = 0
+        self._extension_ready = False
+        self._stats = {
+            "checkouts": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "health_check_failures": 0,
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        # The extension check only needs to happen once per pool (i.e. process).
+        if not self._extension_ready:
+            with conn, conn.cursor() as cur:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            self._extension_ready = True
+        register_vector(conn)
+        return conn
+
+    def _close(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._stats["closed"] += 1
+
+    def _reap_locked(self) -> None:
+        if not self.idle_timeout or self.idle_timeout <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._total > self.minconn and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.pop(0)
+            self._total -= 1
+            self._close(conn)
+
+    def _healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout and self.timeout > 0 else None
+        while True:
+            conn = None
+            idle_since = 0.0
+            with self._cond:
+                while True:
+                    self._reap_locked()
+                    if self._idle:
+                        # LIFO hands out the most recently used, warmest connection.
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._total < self.maxconn:
+                        self._total += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No database connection available within {self.timeout}s"
+                        )
+                    self._cond.wait(remaining)
+                self._in_use += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif not self._healthy(conn, idle_since):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                    self._total -= 1
+                    self._in_use -= 1
+                    self._close(conn)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["wait_seconds"] += waited
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+            return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed:
+                self._total -= 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._reap_locked()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        conn = self.getconn()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.putconn(conn, discard=True)
+            raise
+        except BaseException:
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._total -= 1
+                self._close(conn)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            checkouts = stats["checkouts"]
+            stats.update(
+                {
+                    "size": self._total,
+                    "idle": len(self._idle),
+                    "in_use": self._in_use,
+                    "max_size": self.maxconn,
+                    "utilization": self._in_use / self.maxconn,
+                    "mean_wait_seconds": stats["wait_seconds"] / checkouts if checkouts else 0.0,
+                }
+            )
+        return stats
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
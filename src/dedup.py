@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from config import settings
+from src.doc_metadata import ATTRIBUTE_KEYS
+
+SIMHASH_BITS = 64
+# A SimHash match only drops a chunk when its numbers are identical and its
+# word counts agree this much; otherwise "15 days" and "25 days" versions of
+# a policy would collapse.
+NEAR_JACCARD = 0.98
+_TOKEN = re.compile(r"\w+")
+_SHINGLE = 3
+
+# (source, chunk_index) of a stored chunk.
+ChunkKey = Tuple[str, int]
+# Filterable attributes a chunk is retrieved under; see doc_metadata.ATTRIBUTE_KEYS.
+Scope = Tuple[str, ...]
+
+
+def content_hash(text: str) -> str:
+    """Digest of the text with runs of whitespace collapsed.
+
+    Case and punctuation are kept: "-5" and "5", or "1.5" and "15", are
+    different facts.
+    """
+    normalized = " ".join(text.split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles; similar texts differ in few bits."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= _SHINGLE:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i : i + _SHINGLE]) for i in range(len(tokens) - _SHINGLE + 1)]
+    hashes = np.array(
+        [hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest() for g in grams],
+        dtype="S8",
+    )
+    bits = np.unpackbits(np.frombuffer(hashes.tobytes(), dtype=np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(grams)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+
+def attribute_scope(metadata: dict) -> Scope:
+    """Only chunks with the same doc_type/department/effective_date are deduped.
+
+    A dropped chunk is only findable through its survivor, so the survivor
+    must match every filter the dropped chunk would have.
+    """
+    return tuple(str(metadata.get(key) or "") for key in ATTRIBUTE_KEYS)
+
+
+def hamming(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+
+def token_jaccard(left: str, right: str) -> float:
+    """Jaccard similarity of the two texts' word multisets."""
+    a = Counter(_TOKEN.findall(left.lower()))
+    b = Counter(_TOKEN.findall(right.lower()))
+    union = sum((a | b).values())
+    return sum((a & b).values()) / union if union else 1.0
+
+
+def same_numbers(left: str, right: str) -> bool:
+    """Whether both texts contain exactly the same numeric tokens."""
+    a = Counter(t for t in _TOKEN.findall(left) if any(c.isdigit() for c in t))
+    b = Counter(t for t in _TOKEN.findall(right) if any(c.isdigit() for c in t))
+    return a == b
+
+
+@dataclass
+class DedupResult:
+    texts: List[str]
+    metadatas: List[dict]
+    # Survivor of each dropped chunk that came from another source.
+    duplicate_of: List[ChunkKey] = field(default_factory=list)
+    exact: int = 0
+    near: int = 0
+    # SimHash matches that failed the token check; kept and only reported.
+    candidates: int = 0
+
+
+class DuplicateIndex:
+    """Exact-hash and SimHash near-duplicate lookup over stored chunks.
+
+    Signatures are split into max_distance + 1 bands: two signatures at most
+    max_distance bits apart agree exactly on at least one band, so only
+    chunks sharing a band value are compared bit by bit. A SimHash match is
+    confirmed against the stored text (same numbers, word-count Jaccard >=
+    NEAR_JACCARD) before it counts as a duplicate.
+    """
+
+    def __init__(self, max_distance: int | None = None) -> None:
+        distance = settings.dedup_simhash_distance if max_distance is None else max_distance
+        self.max_distance = max(0, min(distance, 15))
+        self._exact: Dict[Tuple[Scope, str], ChunkKey] = {}
+        self._keys: List[ChunkKey] = []
+        self._signatures: List[int] = []
+        self._texts: List[str] = []
+        bands = self.max_distance + 1
+        widths = [SIMHASH_BITS // bands + (i < SIMHASH_BITS % bands) for i in range(bands)]
+        self._bands = []
+        shift = 0
+        for width in widths:
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+        self._buckets: List[Dict[Tuple[Scope, int], List[int]]] = [{} for _ in self._bands]
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(
+        self, key: ChunkKey, digest: str, signature: int, text: str = "", scope: Scope = ()
+    ) -> None:
+        if (scope, digest) in self._exact:
+            return
+        self._exact[scope, digest] = key
+        if not self.max_distance:
+            return
+        position = len(self._keys)
+        self._keys.append(key)
+        self._signatures.append(signature)
+        self._texts.append(text)
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            buckets.setdefault((scope, (signature >> shift) & mask), []).append(position)
+
+    def match(
+        self, digest: str, signature: int, text: str = "", scope: Scope = ()
+    ) -> Tuple[ChunkKey, str] | None:
+        """(survivor key, "exact" | "near" | "candidate") for a known chunk, else None.
+
+        "candidate" is a SimHash match whose text differs too much to drop.
+        """
+        key = self._exact.get((scope, digest))
+        if key is not None:
+            return key, "exact"
+        if not self.max_distance:
+            return None
+        candidate = None
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            for position in buckets.get((scope, (signature >> shift) & mask), ()):
+                if hamming(signature, self._signatures[position]) > self.max_distance:
+                    continue
+                stored = self._texts[position]
+                if same_numbers(text, stored) and token_jaccard(text, stored) >= NEAR_JACCARD:
+                    return self._keys[position], "near"
+                candidate = candidate or (self._keys[position], "candidate")
+        return candidate
+
+    def load(self, rows: Iterable[tuple]) -> None:
+        """Seed from stored rows of VectorStore.chunk_signatures()."""
+        for source, index, digest, signature, content, *attributes in rows:
+            scope = attribute_scope(dict(zip(ATTRIBUTE_KEYS, attributes)))
+            self.add((source, int(index)), digest, int(signature, 16), content or "", scope)
+
+    def filter(self, source: str, texts: List[str], metadatas: List[dict]) -> DedupResult:
+        """Drop chunks already in the index and register the rest.
+
+        Kept chunks get content_hash / simhash metadata so later runs can seed
+        the index from the table.
+        """
+        result = DedupResult([], [])
+        for text, metadata in zip(texts, metadatas):
+            digest = content_hash(text)
+            signature = simhash(text)
+            scope = attribute_scope(metadata)
+            found = self.match(digest, signature, text, scope)
+            if found is None or found[1] == "candidate":
+                metadata["content_hash"] = digest
+                metadata["simhash"] = f"{signature:016x}"
+                self.add((source, metadata["chunk_index"]), digest, signature, text, scope)
+                result.texts.append(text)
+                result.metadatas.append(metadata)
+                if found is not None:
+                    result.candidates += 1
+                continue
+            survivor, kind = found
+            if kind == "exact":
+                result.exact += 1
+            else:
+                result.near += 1
+            # Repeated boilerplate within one file is dropped without an alias.
+            if survivor[0] != source:
+                result.duplicate_of.append(survivor)
+        return result
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime
+from fnmatch import fnmatch
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config import settings
+
+# Metadata keys promoted to indexed columns in the documents table.
+ATTRIBUTE_KEYS = ("doc_type", "department", "effective_date")
+
+# Only the document header is searched; body text mentions every department.
+_HEADER_CHARS = 1500
+
+_DOC_TYPES: List[Tuple[str, str]] = [
+    (r"standard operating procedure|\bsop\b", "sop"),
+    (r"\bhandbook\b", "handbook"),
+    (r"\bwiki\b|knowledge base", "wiki"),
+    (r"\bpolic(y|ies)\b", "policy"),
+    (r"\bfaq\b", "faq"),
+]
+
+_DEPARTMENTS: List[Tuple[str, str]] = [
+    (r"human resources|\bhr\b", "hr"),
+    # Upper-case only: the pronoun "it" is in half of all titles.
+    (r"information technology|(?-i:\bIT\b)", "it"),
+    (r"\bfinance\b|\baccounting\b", "finance"),
+    (r"\blegal\b|\bcompliance\b", "legal"),
+    (r"knowledge management", "knowledge-management"),
+]
+
+_OWNER = re.compile(r"^(?:process\s+)?(?:owner|department)\s*:\s*(.+)$", re.I | re.M)
+_DATE = re.compile(r"^(?:effective\s+date|last\s+updated)\s*:\s*(.+)$", re.I | re.M)
+_DATE_FORMATS = ("%Y-%m-%d", "%d %B %Y", "%B %d, %Y", "%B %d %Y", "%B %Y", "%b %Y", "%m/%d/%Y")
+
+
+def _match(patterns: List[Tuple[str, str]], text: str) -> str | None:
+    for pattern, value in patterns:
+        if re.search(pattern, text, re.I):
+            return value
+    return None
+
+
+def parse_date(value: str) -> str | None:
+    """ISO date (YYYY-MM-DD) for the header date formats we see, else None."""
+    value = re.sub(r"\s+", " ", value).strip().rstrip(".")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4)
+def _overrides(path: str) -> Dict[str, dict]:
+    if not path or not Path(path).exists():
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def document_attributes(source: str, text: str) -> Dict[str, str]:
+    """doc_type / department / effective_date for a document, where known.
+
+    Values come from the file name and the header block ("Owner: Human
+    Resources Department", "Effective Date: January 2026"); entries in
+    DOCUMENT_METADATA_PATH ({"glob": {"department": "it"}}) override them.
+    """
+    header = text[:_HEADER_CHARS]
+    # Underscores separate words in file names like IT_SOP_Service_Desk.pdf.
+    title = f"{Path(source).stem.replace('_', ' ')}\n{header.splitlines()[0] if header else ''}"
+    attributes: Dict[str, str] = {}
+    doc_type = _match(_DOC_TYPES, title)
+    if doc_type:
+        attributes["doc_type"] = doc_type
+    owner = _OWNER.search(header)
+    department = _match(_DEPARTMENTS, owner.group(1) if owner else title)
+    if department:
+        attributes["department"] = department
+    dated = _DATE.search(header)
+    effective = parse_date(dated.group(1)) if dated else None
+    if effective:
+        attributes["effective_date"] = effective
+    for pattern, values in _overrides(settings.document_metadata_path).items():
+        if fnmatch(source, pattern) or fnmatch(Path(source).name, pattern):
+            attributes.update({k: str(v) for k, v in values.items()})
+    return attributes
+
+
+def matches_filters(metadata: dict, filters: Dict | None) -> bool:
+    """Python twin of vector_store.filter_clause, for the numpy backend."""
+    for key, value in (filters or {}).items():
+        if key in ("effective_from", "effective_to"):
+            effective = metadata.get("effective_date")
+            if not effective:
+                return False
+            if key == "effective_from" and effective < str(value):
+                return False
+            if key == "effective_to" and effective > str(value):
+                return False
+        elif key in ("source", "doc_type", "department"):
+            allowed = value if isinstance(value, (list, tuple, set)) else [value]
+            if str(metadata.get(key)) not in {str(v) for v in allowed}:
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
@@ -1,24 +1,43 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
-from PyPDF2 import PdfReader
+from config import settings
 
 
 @dataclass
 class Document:
     text: str
     source: str
+    # Character offset where each PDF page starts; None for other formats.
+    page_starts: List[int] | None = None
 
 
-def _load_pdf(path: Path) -> str:
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_pdf(path: Path, start: int = 0, end: int | None = None) -> List[str]:
+    from PyPDF2 import PdfReader
+
     reader = PdfReader(str(path))
-    parts = []
-    for page in reader.pages:
-        parts.append(page.extract_text() or "")
-    return "\n".join(parts)
+    return [page.extract_text() or "" for page in reader.pages[start:end]]
+
+
+def _pdf_page_count(path: Path) -> int:
+    from PyPDF2 import PdfReader
+
+    return len(PdfReader(str(path)).pages)
 
 
 def _load_text(path: Path) -> str:
@@ -37,24 +56,139 @@ def _load_docx(path: Path) -> str:
     return "\n".join(p.text for p in doc.paragraphs)
 
 
-def load_documents(paths: Iterable[str]) -> List[Document]:
-    docs: List[Document] = []
+def _extract(raw: str, start: int = 0, end: int | None = None) -> List[str]:
+    # Module-level so it can be pickled into worker processes. Returns one
+    # string per PDF page, or a single string for other formats.
+    path = Path(raw)
+    ext = path.suffix.lower()
+    if ext == ".pdf":
+        return _load_pdf(path, start, end)
+    if ext == ".docx":
+        return [_load_docx(path)]
+    return [_load_text(path)]
+
+
+def _join_pages(pages: Sequence[str]) -> Tuple[str, List[int]]:
+    starts: List[int] = []
+    offset = 0
+    for page in pages:
+        starts.append(offset)
+        offset += len(page) + 1
+    return "\n".join(pages), starts
+
+
+class ParseCache:
+    """Extracted text (and page offsets) on disk, keyed by the file's SHA-256."""
+
+    def __init__(self, directory: str | None = None) -> None:
+        self.directory = Path(directory or settings.parse_cache_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def get(self, digest: str) -> Tuple[str, List[int] | None] | None:
+        path = self._path(digest)
+        if not path.exists():
+            return None
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        return entry["text"], entry.get("page_starts")
+
+    def put(self, digest: str, text: str, page_starts: List[int] | None = None) -> None:
+        path = self._path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"text": text, "page_starts": page_starts}), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def _plan(raw: str) -> List[Tuple[int, int | None]]:
+    size = settings.pdf_pages_per_task
+    if Path(raw).suffix.lower() != ".pdf" or size <= 0:
+        return [(0, None)]
+    pages = _pdf_page_count(Path(raw))
+    if pages <= size:
+        return [(0, None)]
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def iter_documents(
+    paths: Iterable[str],
+    workers: int | None = None,
+    digests: Dict[str, str] | None = None,
+) -> Iterator[Document]:
+    """Yield Documents as soon as each file is parsed.
+
+    Files (and page ranges of long PDFs) are parsed on a process pool;
+    files whose content hash is already in the parse cache skip parsing.
+    Order follows completion, not input.
+    """
+    cache = ParseCache() if settings.parse_cache_dir else None
+    digests = digests or {}
+    workers = workers or settings.parse_workers or os.cpu_count() or 1
+
+    def finish(source: str, digest: str | None, pages: List[str]) -> Document | None:
+        text, page_starts = _join_pages([page.replace("\x00", "") for page in pages])
+        if Path(source).suffix.lower() != ".pdf":
+            page_starts = None
+        if cache is not None and digest:
+            cache.put(digest, text, page_starts)
+        if not text.strip():
+            return None
+        return Document(text=text, source=source, page_starts=page_starts)
+
+    todo: List[Tuple[str, str | None]] = []
+    seen = set()
     for raw in paths:
         path = Path(raw)
-        if not path.exists():
+        source = str(path)
+        # A path listed twice would be planned twice and collide in `parts`.
+        if source in seen or not path.exists():
             continue
-        ext = path.suffix.lower()
-        if ext == ".pdf":
-            text = _load_pdf(path)
-        elif ext == ".docx":
-            text = _load_docx(path)
-        else:
-            text = _load_text(path)
-
-        if text:
-            text = text.replace("\x00", "")
-        if text.strip():
-            docs.append(Document(text=text, source=str(path)))
+        seen.add(source)
+        digest = None
+        if cache is not None:
+            digest = digests.get(source) or file_hash(path)
+            cached = cache.get(digest)
+            if cached is not None:
+                text, page_starts = cached
+                if text.strip():
+                    yield Document(text=text, source=source, page_starts=page_starts)
+                continue
+        todo.append((source, digest))
+
+    plans = {source: _plan(source) for source, _ in todo}
+    if workers <= 1 or sum(len(ranges) for ranges in plans.values()) <= 1:
+        for source, digest in todo:
+            doc = finish(source, digest, _extract(source))
+            if doc is not None:
+                yield doc
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts: Dict[str, List[List[str] | None]] = {}
+        futures = {}
+        for source, digest in todo:
+            parts[source] = [None] * len(plans[source])
+            for slot, (start, end) in enumerate(plans[source]):
+                futures[pool.submit(_extract, source, start, end)] = (source, digest, slot)
+        for future in as_completed(futures):
+            source, digest, slot = futures[future]
+            parts[source][slot] = future.result()
+            if all(part is not None for part in parts[source]):
+                pages = [page for part in parts.pop(source) for page in part]
+                doc = finish(source, digest, pages)
+                if doc is not None:
+                    yield doc
+
+
+def load_documents(paths: Iterable[str]) -> List[Document]:
+    paths = list(paths)
+    order: Dict[str, int] = {}
+    for i, raw in enumerate(paths):
+        order.setdefault(str(Path(raw)), i)
+    docs = list(iter_documents(paths))
+    docs.sort(key=lambda doc: order[doc.source])
     return docs
 
 
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from config import settings
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str | None = None, max_entries: int | None = None) -> None:
+        self.path = Path(path or settings.embedding_cache_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = (
+            settings.embedding_cache_max_entries if max_entries is None else max_entries
+        )
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                is_query INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, is_query, digest)
+            );
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used);"
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_many(
+        self, model: str, is_query: bool, digests: Sequence[str]
+    ) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(digests))
+        with self._lock:
+            # Stay below SQLite's default host-parameter limit.
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self.conn.execute(
+                    f"""
+                    SELECT digest, vector FROM embeddings
+                    WHERE model = ? AND is_query = ? AND digest IN ({placeholders});
+                    """,
+                    (model, int(is_query), *part),
+                ).fetchall()
+                found.update((digest, _unpack(blob)) for digest, blob in rows)
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    """
+                    UPDATE embeddings SET last_used = ?
+                    WHERE model = ? AND is_query = ? AND digest = ?;
+                    """,
+                    [(now, model, int(is_query), digest) for digest in found],
+                )
+                self.conn.commit()
+            hits = sum(1 for digest in digests if digest in found)
+            self.hits += hits
+            self.misses += len(digests) - hits
+        return found
+
+    def put_many(
+        self, model: str, is_query: bool, items: Iterable[Tuple[str, Sequence[float]]]
+    ) -> None:
+        now = time.time()
+        rows = [
+            (model, int(is_query), digest, _pack(vector), now)
+            for digest, vector in items
+            if vector
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO embeddings (model, is_query, digest, vector, last_used)
+                VALUES (?, ?, ?, ?, ?);
+                """,
+                rows,
+            )
+            self.conn.commit()
+        if self.max_entries and self.max_entries > 0:
+            self.prune(self.max_entries)
+
+    def prune(self, max_entries: int) -> int:
+        with self._lock:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM embeddings;").fetchone()
+            excess = count - max_entries
+            if excess <= 0:
+                return 0
+            self.conn.execute(
+                """
+                DELETE FROM embeddings WHERE rowid IN (
+                    SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?
+                );
+                """,
+                (excess,),
+            )
+            self.conn.commit()
+        return excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM embeddings;")
+            self.conn.commit()
+            self.conn.execute("VACUUM;")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT model, is_query, COUNT(*), SUM(LENGTH(vector))
+                FROM embeddings GROUP BY model, is_query;
+                """
+            ).fetchall()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": sum(r[2] for r in rows),
+            "bytes": sum(r[3] or 0 for r in rows),
+            "max_entries": self.max_entries,
+            "by_model": [
+                {"model": model, "is_query": bool(is_query), "entries": count}
+                for model, is_query, count, _ in rows
+            ],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,46 +1,151 @@
-import json
-from typing import List
+from __future__ import annotations
 
-import boto3
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
 
 from config import settings
+from src.bedrock_clients import RUNTIME, get_client
+from src.bedrock_control import BedrockController, get_controller
+from src.embedding_cache import EmbeddingCache, text_digest
+from src.metrics import bedrock_usage, get_metrics
+
+
+@dataclass
+class BatchTiming:
+    size: int
+    seconds: float
+
+
+@dataclass
+class EmbeddingStats:
+    """What one embed_texts call did; the manager is shared, so callers own this."""
+
+    batch_timings: List[BatchTiming] = field(default_factory=list)
+    cached_count: int = 0
 
 
 class EmbeddingsManager:
-    def __init__(self) -> None:
-        self.client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=settings.aws_region,
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-        )
+    def __init__(
+        self,
+        cache: EmbeddingCache | bool | None = None,
+        client=None,
+        controller: BedrockController | None = None,
+    ) -> None:
+        self.client = client or get_client(RUNTIME)
+        self.controller = controller or get_controller()
         self.model_id = settings.embeddings_model
+        self.metrics = get_metrics()
+        # None means "the configured on-disk cache"; False turns caching off.
+        if cache is None and settings.embedding_cache_path:
+            cache = EmbeddingCache()
+        self.cache = cache if isinstance(cache, EmbeddingCache) else None
 
-    def embed_text(self, text: str, is_query: bool = False) -> List[float]:
-        if not text:
-            return []
+    def _invoke(self, body: dict) -> dict:
+        response = self.controller.call(
+            self.model_id,
+            self.client.invoke_model,
+            modelId=self.model_id,
+            body=json.dumps(body),
+            accept="application/json",
+            contentType="application/json",
+        )
+        prompt_tokens, _, retries = bedrock_usage(response)
+        retries += self.controller.last_retries(self.model_id)
+        self.metrics.inc("bedrock_retries_total", retries, model=self.model_id)
+        self.metrics.inc("bedrock_input_tokens_total", prompt_tokens or 0, model=self.model_id)
+        return json.loads(response["body"].read())
+
+    def _batch_size(self) -> int:
+        # Titan accepts a single inputText per request; Cohere takes a texts list.
+        if "cohere.embed" in self.model_id:
+            return max(1, min(settings.embeddings_batch_size, 96))
+        return 1
 
+    def _embed_batch(self, texts: List[str], is_query: bool) -> List[List[float]]:
         if "titan-embed" in self.model_id:
-            body = json.dumps({"inputText": text})
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=body,
-                accept="application/json",
-                contentType="application/json",
-            )
-            payload = json.loads(response["body"].read())
-            return payload["embedding"]
+            return [self._invoke({"inputText": text})["embedding"] for text in texts]
 
         if "cohere.embed" in self.model_id:
             input_type = "search_query" if is_query else "search_document"
-            body = json.dumps({"texts": [text], "input_type": input_type})
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=body,
-                accept="application/json",
-                contentType="application/json",
-            )
-            payload = json.loads(response["body"].read())
-            return payload["embeddings"][0]
+            payload = self._invoke({"texts": texts, "input_type": input_type})
+            return payload["embeddings"]
 
         raise ValueError(f"Unsupported embeddings model: {self.model_id}")
+
+    def embed_text(self, text: str, is_query: bool = False) -> List[float]:
+        if not text:
+            return []
+        return self.embed_texts([text], is_query=is_query)[0]
+
+    def embed_texts(
+        self, texts: Sequence[str], is_query: bool = False, stats: EmbeddingStats | None = None
+    ) -> List[List[float]]:
+        texts = list(texts)
+        results: List[List[float]] = [[] for _ in texts]
+        stats = stats if stats is not None else EmbeddingStats()
+
+        # Identical texts share one request and one cache entry.
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if text:
+                pending.setdefault(text_digest(text), []).append(i)
+        if self.cache is not None and pending:
+            cached = self.cache.get_many(self.model_id, is_query, list(pending))
+            for digest, vector in cached.items():
+                for i in pending.pop(digest):
+                    results[i] = vector
+                    stats.cached_count += 1
+        self.metrics.inc("embedding_cache_hits_total", stats.cached_count, model=self.model_id)
+        self.metrics.inc("embedding_texts_total", len(pending), model=self.model_id)
+        if not pending:
+            return results
+
+        digests = list(pending)
+        size = self._batch_size()
+        batches = [digests[i : i + size] for i in range(0, len(digests), size)]
+
+        def run(batch: List[str]):
+            start = time.perf_counter()
+            vectors = self._embed_batch([texts[pending[d][0]] for d in batch], is_query)
+            elapsed = time.perf_counter() - start
+            self.metrics.observe(
+                "bedrock_request_seconds", elapsed, model=self.model_id, operation="embed"
+            )
+            return batch, vectors, elapsed
+
+        workers = max(1, min(settings.embeddings_concurrency, len(batches)))
+        if workers == 1:
+            completed = map(run, batches)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            # map() yields in submission order, so results stay aligned with input.
+            completed = pool.map(run, batches)
+        fresh = []
+        try:
+            for batch, vectors, elapsed in completed:
+                for digest, vector in zip(batch, vectors):
+                    for i in pending[digest]:
+                        results[i] = vector
+                    fresh.append((digest, vector))
+                stats.batch_timings.append(BatchTiming(size=len(batch), seconds=elapsed))
+        finally:
+            if workers > 1:
+                pool.shutdown()
+            if self.cache is not None:
+                self.cache.put_many(self.model_id, is_query, fresh)
+        return results
+
+    def timing_summary(self, stats: EmbeddingStats) -> str:
+        cached = f", {stats.cached_count} from cache" if self.cache is not None else ""
+        if not stats.batch_timings:
+            return f"0 texts via Bedrock{cached}"
+        total = sum(t.size for t in stats.batch_timings)
+        seconds = [t.seconds for t in stats.batch_timings]
+        return (
+            f"{total} texts via Bedrock in {len(seconds)} requests, "
+            f"mean {sum(seconds) / len(seconds):.3f}s, max {max(seconds):.3f}s per request"
+            f"{cached}"
+        )
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+from src.document_loader import Document
+from src.embeddings import BatchTiming, EmbeddingStats
+
+_VOCABULARY = (
+    "policy employee leave request approval manager days annual sick parental "
+    "remote work office laptop access password reset ticket incident priority "
+    "escalation service desk benefits payroll expense travel reimbursement "
+    "security training onboarding offboarding contract holiday overtime review "
+    "compliance audit data retention vendor procurement budget equipment"
+).split()
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    # Deterministic unit vector derived from the text's hash.
+    values: List[float] = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend((b - 127.5) / 127.5 for b in digest)
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class FakeEmbeddings:
+    """Offline stand-in for EmbeddingsManager with a fixed per-request latency."""
+
+    def __init__(
+        self, dim: int = 1536, latency: float = 0.0, batch_size: int = 1, concurrency: int = 1
+    ) -> None:
+        self.dim = dim
+        self.latency = latency
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.model_id = "fake-embed"
+        self.cache = None
+
+    def embed_text(self, text: str, is_query: bool = False) -> List[float]:
+        if not text:
+            return []
+        if self.latency:
+            time.sleep(self.latency)
+        return fake_vector(text, self.dim)
+
+    def embed_texts(
+        self, texts: Sequence[str], is_query: bool = False, stats: EmbeddingStats | None = None
+    ) -> List[List[float]]:
+        # One simulated request (and one latency) per batch_size texts, with up
+        # to `concurrency` requests in flight like EmbeddingsManager.
+        texts = list(texts)
+        batches = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        def run(batch: List[str]):
+            start = time.perf_counter()
+            if self.latency:
+                time.sleep(self.latency)
+            vectors = [fake_vector(text, self.dim) if text else [] for text in batch]
+            return vectors, BatchTiming(len(batch), time.perf_counter() - start)
+
+        workers = min(self.concurrency, len(batches))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                completed = list(pool.map(run, batches))
+        else:
+            completed = [run(batch) for batch in batches]
+        if stats is not None:
+            stats.batch_timings.extend(timing for _, timing in completed)
+        return [vector for vectors, _ in completed for vector in vectors]
+
+    def timing_summary(self, stats: EmbeddingStats) -> str:
+        return f"{len(stats.batch_timings)} fake embedding requests"
+
+
+class FakeLLM:
+    """Offline stand-in for BedrockLLM that echoes the prompt size."""
+
+    def __init__(self, latency: float = 0.0, tokens: int = 20) -> None:
+        self.latency = latency
+        self.tokens = tokens
+        self.model_id = "fake-llm"
+
+    def generate(self, prompt: str, usage: dict | None = None) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        if usage is not None:
+            usage.update(prompt_tokens=len(prompt) // 4, completion_tokens=10, retries=0)
+        return f"- Answer based on {len(prompt)} prompt characters."
+
+    def generate_stream(self, prompt: str, usage: dict | None = None):
+        start = time.perf_counter()
+        per_token = self.latency / self.tokens if self.tokens else 0.0
+        time_to_first_token = None
+        for i in range(self.tokens):
+            if per_token:
+                time.sleep(per_token)
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start
+            yield f"token{i} "
+        if usage is not None:
+            usage.update(
+                prompt_tokens=len(prompt) // 4,
+                completion_tokens=self.tokens,
+                retries=0,
+                time_to_first_token=time_to_first_token,
+            )
+
+
+class FakeAsyncStore:
+    """In-memory AsyncVectorStore stand-in with a fixed query latency."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+
+    async def acquire(self):
+        return object()
+
+    async def release(self, conn) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def corpus_version(self, conn) -> int:
+        return 0
+
+    async def similarity_search(self, query_embedding, top_k, conn=None):
+        await asyncio.sleep(self.latency)
+        return [
+            (f"Policy passage {i}", {"source": f"doc_{i}.pdf"}, 0.9 - i * 0.01)
+            for i in range(top_k)
+        ]
+
+
+class FakeClientError(Exception):
+    """Shaped like botocore's ClientError: the code is in response["Error"]["Code"]."""
+
+    def __init__(self, code: str, operation: str) -> None:
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation")
+        status = 429 if code == "ThrottlingException" else 503
+        self.response = {
+            "Error": {"Code": code, "Message": "injected by FakeBedrockClient"},
+            "ResponseMetadata": {"HTTPStatusCode": status},
+        }
+
+
+class FakeBedrockClient:
+    """Offline bedrock-runtime client that throttles like the service.
+
+    Requests beyond `capacity` in flight, or beyond `rate` per second, raise a
+    ThrottlingException; `throttle_rate` adds random throttles and setting
+    `outage` makes every request fail with ServiceUnavailableException. Pass
+    it as `client=` to EmbeddingsManager / BedrockLLM, with `cache=False` on
+    EmbeddingsManager so fake vectors never reach the on-disk cache.
+    """
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        latency: float = 0.0,
+        capacity: int = 0,
+        rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.dim = dim
+        self.latency = latency
+        self.capacity = capacity
+        self.rate = rate
+        self.throttle_rate = throttle_rate
+        self.outage = False
+        self.requests = 0
+        self.throttled = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._recent: deque = deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _enter(self, operation: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if self.outage:
+                raise FakeClientError("ServiceUnavailableException", operation)
+            if (
+                (self.capacity and self._in_flight >= self.capacity)
+                or (self.rate and len(self._recent) >= self.rate)
+                or self._random.random() < self.throttle_rate
+            ):
+                self.throttled += 1
+                raise FakeClientError("ThrottlingException", operation)
+            self._recent.append(now)
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _payload(self, model_id: str, request: dict) -> dict:
+        if "inputText" in request:
+            return {"embedding": fake_vector(request["inputText"], self.dim)}
+        if "texts" in request:
+            return {"embeddings": [fake_vector(text, self.dim) for text in request["texts"]]}
+        text = f"Answer from {model_id}."
+        if "anthropic.claude" in model_id:
+            return {"content": [{"type": "text", "text": text}]}
+        return {"outputs": [{"text": text}]}
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        self._enter("InvokeModel")
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            payload = self._payload(modelId, json.loads(body))
+        finally:
+            self._exit()
+        return {
+            "body": io.BytesIO(json.dumps(payload).encode("utf-8")),
+            "ResponseMetadata": {"HTTPHeaders": {}, "RetryAttempts": 0},
+        }
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> dict:
+        self._enter("InvokeModelWithResponseStream")
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            self._exit()
+        text = f"Answer from {modelId}."
+        if "anthropic.claude" in modelId:
+            events = [{"type": "content_block_delta", "delta": {"text": text}}]
+        else:
+            events = [{"outputs": [{"text": text}]}]
+        return {
+            "body": [{"chunk": {"bytes": json.dumps(e).encode("utf-8")}} for e in events],
+            "ResponseMetadata": {"HTTPHeaders": {}, "RetryAttempts": 0},
+        }
+
+
+class FakeAgentRuntimeClient:
+    """Offline bedrock-agent-runtime `retrieve` with paging and a fixed latency.
+
+    Every query has `available` results; each call returns at most
+    `page_size` of them plus a nextToken while more remain.
+    """
+
+    def __init__(self, latency: float = 0.0, available: int = 25, page_size: int = 10) -> None:
+        self.latency = latency
+        self.available = available
+        self.page_size = page_size
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def retrieve(
+        self,
+        knowledgeBaseId: str,
+        retrievalQuery: dict,
+        retrievalConfiguration: dict,
+        nextToken: str | None = None,
+    ) -> dict:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        requested = retrievalConfiguration["vectorSearchConfiguration"]["numberOfResults"]
+        offset = int(nextToken or 0)
+        end = min(self.available, offset + min(requested, self.page_size))
+        text = retrievalQuery["text"]
+        response = {
+            "retrievalResults": [
+                {
+                    "content": {"text": f"{text} - passage {n}"},
+                    "score": round(1.0 - n / (self.available + 1), 4),
+                    "location": {"s3Location": {"uri": f"s3://{knowledgeBaseId}/doc_{n}.txt"}},
+                    "metadata": {"rank": n},
+                }
+                for n in range(offset, end)
+            ]
+        }
+        if end < self.available:
+            response["nextToken"] = str(end)
+        return response
+
+
+def synthetic_documents(
+    count: int, seed: int = 0, paragraphs: tuple = (5, 40)
+) -> List[Document]:
+    """Deterministic policy-like documents with paragraph and line breaks."""
+    rng = random.Random(seed)
+    documents = []
+    for n in range(count):
+        blocks = []
+        for _ in range(rng.randint(*paragraphs)):
+            sentences = [
+                " ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(4, 30))) + "."
+                for _ in range(rng.randint(1, 8))
+            ]
+            blocks.append("\n".join(sentences) if rng.random() < 0.3 else " ".join(sentences))
+        documents.append(Document(text="\n\n".join(blocks), source=f"synthetic/doc_{n:05d}.txt"))
+    return documents
+
+
+def synthetic_questions(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        "What is the " + " ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(2, 6))) + "?"
+        for _ in range(count)
+    ]
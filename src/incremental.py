@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+from config import settings
+from src.dedup import DuplicateIndex
+from src.document_loader import file_hash, iter_documents
+from src.ingest_pipeline import ChunkGroup, StageStats, StreamingIngest
+
+if TYPE_CHECKING:
+    from src.embeddings import EmbeddingsManager
+    from src.vector_store import VectorStore
+
+
+@dataclass
+class SyncReport:
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    chunks_written: int = 0
+    chunks_removed: int = 0
+    duplicate_chunks: int = 0
+    near_duplicate_chunks: int = 0
+    near_duplicate_candidates: int = 0
+    embedding_requests: int = 0
+    embedding_seconds: float = 0.0
+    index_action: str | None = None
+    stages: List[StageStats] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.updated)} updated, "
+            f"{len(self.skipped)} unchanged, {len(self.removed)} removed; "
+            f"{self.chunks_written} chunks written, {self.chunks_removed} chunks deleted, "
+            f"{self.embedding_requests} embedding requests ({self.embedding_seconds:.1f}s), "
+            f"{self.duplicate_chunks} duplicate chunks not embedded or stored "
+            f"({self.near_duplicate_chunks} near-duplicates; "
+            f"{self.near_duplicate_candidates} similar chunks kept)"
+        )
+
+
+def _is_under(source: str, root: Path) -> bool:
+    parts = Path(source).parts
+    return parts[: len(root.parts)] == root.parts
+
+
+def sync_paths(
+    paths: Iterable[str],
+    store: VectorStore,
+    embeddings_manager: EmbeddingsManager,
+    prune_root: str | None = None,
+) -> SyncReport:
+    """Ingest only new or changed files; drop sources missing under prune_root."""
+    report = SyncReport()
+    store.ensure_manifest()
+    manifest = store.get_manifest()
+    schema_ready = False
+    seen = set()
+
+    changed: Dict[str, tuple] = {}
+    for raw in paths:
+        path = Path(raw)
+        if not path.is_file():
+            continue
+        source = str(path)
+        seen.add(source)
+        stat = path.stat()
+        entry = manifest.get(source)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            report.skipped.append(source)
+            continue
+
+        content_hash = file_hash(path)
+        if entry and entry["content_hash"] == content_hash:
+            store.touch_source(source, stat.st_size, stat.st_mtime)
+            report.skipped.append(source)
+            continue
+        changed[source] = (stat, content_hash, entry)
+
+    missing: List[str] = []
+    if prune_root is not None:
+        root = Path(prune_root)
+        missing = [s for s in manifest if s not in seen and _is_under(s, root)]
+
+    dedup = None
+    if manifest and (changed or missing):
+        # Files whose chunks were skipped as duplicates of a source that is
+        # being replaced or removed must be re-read, or their text would be lost.
+        replaced = [source for source, item in changed.items() if item[2]]
+        for alias in store.alias_sources(replaced + missing):
+            path = Path(alias)
+            if alias in changed or alias in missing or not path.is_file():
+                continue
+            changed[alias] = (path.stat(), file_hash(path), manifest.get(alias))
+            if alias in report.skipped:
+                report.skipped.remove(alias)
+    if settings.ingest_dedup and changed:
+        dedup = DuplicateIndex()
+        if manifest:
+            dedup.load(
+                store.chunk_signatures(
+                    exclude=list(changed) + missing, with_content=dedup.max_distance > 0
+                )
+            )
+
+    # Changed files stream through load -> chunk -> embed -> write with
+    # bounded queues; each micro-batch of sources is committed together.
+    def write_batch(groups: List[ChunkGroup]) -> int:
+        nonlocal schema_ready
+        dims = [group.embeddings.shape[1] for group in groups if len(group.texts)]
+        if not schema_ready and dims:
+            store.ensure_schema(embedding_dim=dims[0])
+            schema_ready = True
+        items = []
+        aliases = []
+        for group in groups:
+            aliases.extend((source, index, group.source) for source, index in group.duplicate_of)
+            stat, content_hash, entry = changed.pop(group.source)
+            items.append(
+                (
+                    group.source,
+                    stat.st_size,
+                    stat.st_mtime,
+                    content_hash,
+                    group.texts,
+                    group.metadatas,
+                    group.embeddings,
+                )
+            )
+            (report.updated if entry else report.added).append(group.source)
+        written = store.replace_sources(items, aliases)
+        report.chunks_written += written
+        return written
+
+    digests = {source: item[1] for source, item in changed.items()}
+    pipeline = StreamingIngest(embeddings_manager, dedup=dedup)
+    report.stages = pipeline.run(iter_documents(list(changed), digests=digests), write_batch)
+    report.embedding_requests += pipeline.embedding_requests
+    report.embedding_seconds += pipeline.embedding_seconds
+    report.duplicate_chunks = pipeline.duplicates_exact + pipeline.duplicates_near
+    report.near_duplicate_chunks = pipeline.duplicates_near
+    report.near_duplicate_candidates = pipeline.near_candidates
+
+    # Whatever is left produced no text; drop what earlier versions contributed.
+    for source, (_, _, entry) in changed.items():
+        if entry:
+            report.chunks_removed += store.remove_sources([source])
+            report.updated.append(source)
+        else:
+            report.skipped.append(source)
+
+    if missing:
+        report.chunks_removed += store.remove_sources(missing)
+        report.removed.extend(missing)
+
+    if report.chunks_written or report.chunks_removed:
+        report.index_action = store.maintain_index()
+    return report
+
+
+def sync_directory(
+    directory: str, store: VectorStore, embeddings_manager: EmbeddingsManager
+) -> SyncReport:
+    root = Path(directory)
+    files = sorted(str(p) for p in root.rglob("*") if p.is_file())
+    return sync_paths(files, store, embeddings_manager, prune_root=directory)
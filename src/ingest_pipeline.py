@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Iterable, List, Tuple
+
+import numpy as np
+
+from config import settings
+from src.dedup import DuplicateIndex
+from src.document_loader import Document
+from src.metrics import get_metrics
+from src.utils import chunk_documents, get_chunker
+
+if TYPE_CHECKING:
+    from src.embeddings import EmbeddingsManager
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    rows: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    _depth_total: int = 0
+    _depth_samples: int = 0
+
+    def record_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self._depth_total / self._depth_samples if self._depth_samples else 0.0
+
+    def summary(self) -> str:
+        count, unit = (self.rows, "chunks") if self.rows else (self.items, "docs")
+        rate = count / self.busy_seconds if self.busy_seconds else 0.0
+        text = f"{self.name}: {self.items} docs"
+        if self.rows:
+            text += f", {self.rows} chunks"
+        text += f", {self.busy_seconds:.2f}s busy ({rate:.0f} {unit}/s)"
+        if self._depth_samples:
+            text += (
+                f", output queue max {self.max_queue_depth}, "
+                f"mean {self.mean_queue_depth:.1f}"
+            )
+        return text
+
+
+@dataclass
+class ChunkGroup:
+    """All chunks of one source; embeddings are a (n, dim) float32 array."""
+
+    source: str
+    texts: List[str]
+    metadatas: List[dict]
+    embeddings: np.ndarray | None = None
+    # (source, chunk_index) of the stored chunk each dropped duplicate matched.
+    duplicate_of: List[Tuple[str, int]] = field(default_factory=list)
+
+
+@dataclass
+class StreamingIngest:
+    """load -> chunk (+ dedup) -> embed -> write, one thread per stage.
+
+    Stages are joined by bounded queues, so at most queue_size chunk groups
+    per stage are ever held in memory, and the writer commits every
+    commit_rows chunks so a crash only loses the current micro-batch.
+    With a DuplicateIndex, chunks it already holds are dropped before
+    embedding and reported on their group's duplicate_of.
+    """
+
+    embeddings_manager: EmbeddingsManager
+    queue_size: int = field(default_factory=lambda: settings.ingest_queue_size)
+    commit_rows: int = field(default_factory=lambda: settings.db_batch_size)
+    dedup: DuplicateIndex | None = None
+    stages: List[StageStats] = field(default_factory=list)
+    embedding_requests: int = 0
+    embedding_seconds: float = 0.0
+    duplicates_exact: int = 0
+    duplicates_near: int = 0
+    near_candidates: int = 0
+
+    def run(
+        self,
+        documents: Iterable[Document],
+        write_batch: Callable[[List[ChunkGroup]], int],
+    ) -> List[StageStats]:
+        size = max(1, self.queue_size)
+        docs_q: queue.Queue = queue.Queue(maxsize=size)
+        chunks_q: queue.Queue = queue.Queue(maxsize=size)
+        embedded_q: queue.Queue = queue.Queue(maxsize=size)
+        load_stats, chunk_stats, embed_stats, write_stats = (
+            StageStats("load"),
+            StageStats("chunk"),
+            StageStats("embed"),
+            StageStats("write"),
+        )
+        self.stages = [load_stats, chunk_stats, embed_stats, write_stats]
+        dedup_stats = StageStats("dedup")
+        if self.dedup is not None:
+            self.stages.insert(2, dedup_stats)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def put(q: queue.Queue, item, stats: StageStats) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                stats.record_depth(q.qsize())
+                return True
+            return False
+
+        def get(q: queue.Queue):
+            while True:
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    if stop.is_set():
+                        return _DONE
+
+        def load() -> None:
+            iterator = iter(documents)
+            while True:
+                start = time.perf_counter()
+                doc = next(iterator, _DONE)
+                if doc is _DONE:
+                    break
+                load_stats.busy_seconds += time.perf_counter() - start
+                load_stats.items += 1
+                if not put(docs_q, doc, load_stats):
+                    return
+            put(docs_q, _DONE, load_stats)
+
+        def chunk() -> None:
+            chunker = get_chunker()
+            while (doc := get(docs_q)) is not _DONE:
+                start = time.perf_counter()
+                texts, metadatas = chunk_documents([doc], chunker)
+                chunk_stats.busy_seconds += time.perf_counter() - start
+                chunk_stats.items += 1
+                chunk_stats.rows += len(texts)
+                group = ChunkGroup(doc.source, texts, metadatas)
+                if self.dedup is not None:
+                    start = time.perf_counter()
+                    result = self.dedup.filter(doc.source, texts, metadatas)
+                    group = ChunkGroup(
+                        doc.source, result.texts, result.metadatas, duplicate_of=result.duplicate_of
+                    )
+                    self.duplicates_exact += result.exact
+                    self.duplicates_near += result.near
+                    self.near_candidates += result.candidates
+                    dedup_stats.busy_seconds += time.perf_counter() - start
+                    dedup_stats.items += 1
+                    dedup_stats.rows += len(result.texts)
+                if not put(chunks_q, group, chunk_stats):
+                    return
+            put(chunks_q, _DONE, chunk_stats)
+
+        def embed() -> None:
+            from src.embeddings import EmbeddingStats
+
+            while (group := get(chunks_q)) is not _DONE:
+                if not group.texts:
+                    # Every chunk was a duplicate; still written so its source is recorded.
+                    group.embeddings = np.empty((0, 0), dtype=np.float32)
+                    if not put(embedded_q, group, embed_stats):
+                        return
+                    continue
+                start = time.perf_counter()
+                stats = EmbeddingStats()
+                vectors = self.embeddings_manager.embed_texts(group.texts, stats=stats)
+                # Drop the per-float Python objects as soon as possible.
+                group.embeddings = np.asarray(vectors, dtype=np.float32)
+                del vectors
+                self.embedding_requests += len(stats.batch_timings)
+                self.embedding_seconds += sum(t.seconds for t in stats.batch_timings)
+                embed_stats.busy_seconds += time.perf_counter() - start
+                embed_stats.items += 1
+                embed_stats.rows += len(group.texts)
+                if not put(embedded_q, group, embed_stats):
+                    return
+            put(embedded_q, _DONE, embed_stats)
+
+        def write() -> None:
+            pending: List[ChunkGroup] = []
+            rows = 0
+
+            def flush() -> None:
+                nonlocal pending, rows
+                if not pending:
+                    return
+                start = time.perf_counter()
+                write_stats.rows += write_batch(pending)
+                write_stats.busy_seconds += time.perf_counter() - start
+                write_stats.items += len(pending)
+                pending, rows = [], 0
+
+            while (group := get(embedded_q)) is not _DONE:
+                pending.append(group)
+                rows += len(group.texts)
+                # Commit once the micro-batch is full or the pipeline is idle.
+                if rows >= self.commit_rows or embedded_q.empty():
+                    flush()
+            if not stop.is_set():
+                flush()
+
+        def guard(target: Callable[[], None]) -> Callable[[], None]:
+            def runner() -> None:
+                try:
+                    target()
+                except BaseException as exc:
+                    errors.append(exc)
+                    stop.set()
+
+            return runner
+
+        threads = [
+            threading.Thread(target=guard(stage), name=f"ingest-{stage.__name__}", daemon=True)
+            for stage in (load, chunk, embed, write)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics = get_metrics()
+        for stats in self.stages:
+            metrics.inc("ingest_stage_busy_seconds_total", stats.busy_seconds, stage=stats.name)
+            metrics.inc("ingest_stage_rows_total", stats.rows, stage=stats.name)
+        metrics.inc("bedrock_embedding_requests_total", self.embedding_requests)
+        metrics.inc("ingest_duplicate_chunks_total", self.duplicates_exact, kind="exact")
+        metrics.inc("ingest_duplicate_chunks_total", self.duplicates_near, kind="near")
+        metrics.log(
+            "ingest",
+            stages={
+                s.name: {"items": s.items, "rows": s.rows, "busy_seconds": s.busy_seconds}
+                for s in self.stages
+            },
+            embedding_requests=self.embedding_requests,
+            duplicates={
+                "exact": self.duplicates_exact,
+                "near": self.duplicates_near,
+                "candidates": self.near_candidates,
+            },
+            error=repr(errors[0]) if errors else None,
+        )
+        if errors:
+            raise errors[0]
+        return self.stages
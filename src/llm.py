@@ -1,23 +1,39 @@
-import json
+from __future__ import annotations
 
-import boto3
+import json
+import time
+from typing import Iterator
 
 from config import settings
+from src.bedrock_clients import RUNTIME, get_client
+from src.bedrock_control import BedrockController, get_controller
+from src.metrics import bedrock_usage, get_metrics
 
 
 class BedrockLLM:
-    def __init__(self) -> None:
-        self.client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=settings.aws_region,
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-        )
+    def __init__(self, client=None, controller: BedrockController | None = None) -> None:
+        self.client = client or get_client(RUNTIME)
+        self.controller = controller or get_controller()
         self.model_id = settings.llm_model
+        self.metrics = get_metrics()
 
-    def generate(self, prompt: str) -> str:
+    def _record(self, operation: str, seconds: float, usage: dict) -> None:
+        self.metrics.observe(
+            "bedrock_request_seconds", seconds, model=self.model_id, operation=operation
+        )
+        self.metrics.inc("bedrock_retries_total", usage.get("retries") or 0, model=self.model_id)
+        self.metrics.inc(
+            "bedrock_input_tokens_total", usage.get("prompt_tokens") or 0, model=self.model_id
+        )
+        self.metrics.inc(
+            "bedrock_output_tokens_total",
+            usage.get("completion_tokens") or 0,
+            model=self.model_id,
+        )
+
+    def _request_body(self, prompt: str) -> str:
         if "anthropic.claude" in self.model_id:
-            body = json.dumps(
+            return json.dumps(
                 {
                     "anthropic_version": "bedrock-2023-05-31",
                     "max_tokens": settings.max_tokens,
@@ -25,17 +41,9 @@ class BedrockLLM:
                     "messages": [{"role": "user", "content": prompt}],
                 }
             )
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=body,
-                accept="application/json",
-                contentType="application/json",
-            )
-            payload = json.loads(response["body"].read())
-            return payload["content"][0]["text"].strip()
 
         if "mistral." in self.model_id:
-            body = json.dumps(
+            return json.dumps(
                 {
                     "prompt": prompt,
                     "max_tokens": settings.max_tokens,
@@ -43,13 +51,83 @@ class BedrockLLM:
                     "top_p": 0.9,
                 }
             )
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=body,
-                accept="application/json",
-                contentType="application/json",
-            )
-            payload = json.loads(response["body"].read())
-            return payload["outputs"][0]["text"].strip()
 
         raise ValueError(f"Unsupported LLM model: {self.model_id}")
+
+    def generate(self, prompt: str, usage: dict | None = None) -> str:
+        """Return the completion; `usage` receives this call's token counts and retries."""
+        start = time.perf_counter()
+        response = self.controller.call(
+            self.model_id,
+            self.client.invoke_model,
+            modelId=self.model_id,
+            body=self._request_body(prompt),
+            accept="application/json",
+            contentType="application/json",
+        )
+        payload = json.loads(response["body"].read())
+        prompt_tokens, completion_tokens, retries = bedrock_usage(response)
+        retries += self.controller.last_retries(self.model_id)
+        call_usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "retries": retries,
+        }
+        self._record("generate", time.perf_counter() - start, call_usage)
+        if usage is not None:
+            usage.update(call_usage)
+        if "anthropic.claude" in self.model_id:
+            return payload["content"][0]["text"].strip()
+        return payload["outputs"][0]["text"].strip()
+
+    def _chunk_text(self, event: dict) -> str:
+        if "anthropic.claude" in self.model_id:
+            if event.get("type") == "content_block_delta":
+                return event.get("delta", {}).get("text", "")
+            return ""
+        outputs = event.get("outputs") or []
+        return outputs[0].get("text", "") if outputs else ""
+
+    def generate_stream(self, prompt: str, usage: dict | None = None) -> Iterator[str]:
+        """Yield text chunks; `usage` also gets "time_to_first_token" once the stream ends."""
+        body = self._request_body(prompt)
+        start = time.perf_counter()
+        # Throttles surface when the stream is opened, so only that call is
+        # controlled; the concurrency slot is released once the stream starts.
+        response = self.controller.call(
+            self.model_id,
+            self.client.invoke_model_with_response_stream,
+            modelId=self.model_id,
+            body=body,
+            accept="application/json",
+            contentType="application/json",
+        )
+        _, _, retries = bedrock_usage(response)
+        retries += self.controller.last_retries(self.model_id)
+        call_usage = {
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "retries": retries,
+            "time_to_first_token": None,
+        }
+        try:
+            for event in response["body"]:
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+                payload = json.loads(chunk["bytes"])
+                # The last chunk carries Bedrock's token counts for the whole call.
+                invocation = payload.get("amazon-bedrock-invocationMetrics")
+                if invocation:
+                    call_usage["prompt_tokens"] = invocation.get("inputTokenCount")
+                    call_usage["completion_tokens"] = invocation.get("outputTokenCount")
+                text = self._chunk_text(payload)
+                if not text:
+                    continue
+                if call_usage["time_to_first_token"] is None:
+                    call_usage["time_to_first_token"] = time.perf_counter() - start
+                yield text
+        finally:
+            self._record("generate_stream", time.perf_counter() - start, call_usage)
+            if usage is not None:
+                usage.update(call_usage)
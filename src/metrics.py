@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Tuple
+
+from config import settings
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, object]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """Process-wide counters and latency histograms in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, float] = {}
+        self._histograms: Dict[_Key, list] = {}
+        self._gauges: Dict[_Key, float] = {}
+        self._log_lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        if not value:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels) -> None:
+        """Set a point-in-time value (concurrency limit, breaker state, ...)."""
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            # [bucket counts..., sum, count]
+            hist = self._histograms.setdefault(key, [0] * len(BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[dict]:
+        """Time a block into histogram `name`, inside an OpenTelemetry span if enabled.
+
+        The yielded dict collects span attributes (rows, tokens, ...) the block
+        wants to attach; its "seconds" key is set when the block exits.
+        """
+        attributes: dict = {}
+        span_cm = _span(labels.get("stage") or name, labels)
+        span = span_cm.__enter__() if span_cm is not None else None
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            attributes["seconds"] = time.perf_counter() - start
+            self.observe(name, attributes["seconds"], **labels)
+            if span is not None:
+                for key, value in attributes.items():
+                    if value is not None:
+                        span.set_attribute(key, value)
+                span_cm.__exit__(None, None, None)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            gauges = sorted(self._gauges.items())
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            if name not in seen:
+                lines.append(f"# TYPE {name} gauge")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), hist in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            for bound, count in zip(BUCKETS, hist):
+                bucket = _format_labels(labels, f'le="{bound}"')
+                lines.append(f"{name}_bucket{bucket} {count}")
+            bucket = _format_labels(labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{bucket} {hist[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(hist) for key, hist in self._histograms.items()}
+            gauges = dict(self._gauges)
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(gauges.items())
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist[-1],
+                    "sum": hist[-2],
+                    "mean": hist[-2] / hist[-1] if hist[-1] else 0.0,
+                }
+                for (name, labels), hist in sorted(histograms.items())
+            ],
+        }
+
+    def log(self, event: str, **fields) -> None:
+        """Append one JSON line to METRICS_LOG_PATH (no-op when unset)."""
+        if not settings.metrics_log_path:
+            return
+        record = {"ts": round(time.time(), 3), "event": event, **fields}
+        line = json.dumps(record, default=str)
+        with self._log_lock, open(settings.metrics_log_path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+
+
+_tracer = None
+
+
+def _span(name: str, labels: dict):
+    """A current-span context manager (so nested timers nest), or None."""
+    global _tracer
+    if not settings.otel_enabled:
+        return None
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+        except Exception:  # pragma: no cover - optional dependency
+            return None
+        _tracer = trace.get_tracer("rag")
+    return _tracer.start_as_current_span(
+        name, attributes={k: str(v) for k, v in labels.items() if v is not None}
+    )
+
+
+def bedrock_usage(response: dict) -> Tuple[int | None, int | None, int]:
+    """(input tokens, output tokens, retry attempts) from a Bedrock response."""
+    meta = response.get("ResponseMetadata") or {}
+    headers = meta.get("HTTPHeaders") or {}
+    prompt = headers.get("x-amzn-bedrock-input-token-count")
+    completion = headers.get("x-amzn-bedrock-output-token-count")
+    return (
+        int(prompt) if prompt is not None else None,
+        int(completion) if completion is not None else None,
+        int(meta.get("RetryAttempts") or 0),
+    )
+
+
+_metrics: Metrics | None = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(get_metrics().snapshot()).encode("utf-8")
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = get_metrics().render().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_metrics_server(port: int | None = None, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread."""
+    server = ThreadingHTTPServer((host, settings.metrics_port if port is None else port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
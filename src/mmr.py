@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(
+    query: Sequence[float],
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    time_budget: float | None = None,
+    relevance: Sequence[float] | None = None,
+) -> List[int]:
+    """Indices of k candidates chosen by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    lambda * sim(query, c) - (1 - lambda) * max(sim(c, selected)), keeping the
+    running max-similarity-to-selected as one vector so a step is a single
+    matrix-vector product. If time_budget (seconds) runs out, the remaining
+    slots are filled in plain relevance order.
+
+    relevance replaces sim(query, c) with the caller's own ranking scores
+    (e.g. hybrid RRF scores), min-max scaled to [0, 1] so they trade off
+    against cosine redundancy on a comparable scale.
+    """
+    n = candidates.shape[0] if candidates.ndim == 2 else 0
+    k = min(k, n)
+    if k <= 0:
+        return []
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    matrix = _normalize(np.asarray(candidates, dtype=np.float32))
+    query_vec = _normalize(np.asarray(query, dtype=np.float32))
+    if relevance is None:
+        relevance = matrix @ query_vec
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)[:n]
+        low, spread = float(relevance.min()), float(relevance.max() - relevance.min())
+        relevance = (relevance - low) / spread if spread > 0 else np.ones(n, dtype=np.float32)
+
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    redundancy = matrix @ matrix[selected[0]]
+    while len(selected) < k:
+        if deadline is not None and time.perf_counter() > deadline:
+            rest = [int(i) for i in np.argsort(-relevance) if available[i]]
+            selected.extend(rest[: k - len(selected)])
+            break
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(redundancy, matrix @ matrix[pick], out=redundancy)
+    return selected
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+from src.doc_metadata import ATTRIBUTE_KEYS, matches_filters
+from src.metrics import get_metrics
+
+EMBEDDINGS_FILE = "embeddings.npy"
+RECORDS_FILE = "records.jsonl"
+STATE_FILE = "state.json"
+
+
+def _save(path: Path, matrix: np.ndarray) -> None:
+    # np.save appends ".npy" to bare paths, so hand it a file object.
+    with path.open("wb") as handle:
+        np.save(handle, matrix)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class NumpyVectorStore:
+    """In-process VectorStore backend over a memory-mapped float32 .npy matrix.
+
+    Rows are L2-normalized on write, so cosine similarity is a single
+    matrix-vector product at query time. add_documents appends a segment
+    file and a growable in-memory buffer instead of rewriting the matrix;
+    segments are folded into embeddings.npy by compact(), which close() runs.
+    """
+
+    def __init__(self, directory: str | None = None) -> None:
+        self.directory = Path(directory or settings.numpy_store_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        state_path = self.directory / STATE_FILE
+        self.state = json.loads(state_path.read_text()) if state_path.exists() else {"version": 0}
+        matrix_path = self.directory / EMBEDDINGS_FILE
+        self.matrix: np.ndarray | None = (
+            np.load(matrix_path, mmap_mode="r") if matrix_path.exists() else None
+        )
+        self._buffer: np.ndarray | None = None
+        segments = [np.load(self.directory / name) for name in self.state.get("segments", [])]
+        if segments:
+            # A compact() interrupted before its state write already holds some.
+            base = 0 if self.matrix is None else self.matrix.shape[0]
+            folded = base - self.state.get("base_rows", base)
+            self._append_rows(np.concatenate(segments)[folded:])
+        self.contents: List[str] = []
+        self.metadatas: List[dict] = []
+        records_path = self.directory / RECORDS_FILE
+        if records_path.exists():
+            with records_path.open("rb") as handle:
+                data = handle.read(self.state.get("records_bytes", -1))
+            for line in data.splitlines():
+                record = json.loads(line)
+                self.contents.append(record["content"])
+                self.metadatas.append(record["metadata"] or {})
+
+    def _append_rows(self, block: np.ndarray) -> None:
+        # Grow by doubling so appends copy each row O(1) times amortized.
+        rows = 0 if self.matrix is None else self.matrix.shape[0]
+        needed = rows + block.shape[0]
+        if self._buffer is None or self._buffer.shape[0] < needed:
+            buffer = np.empty((max(needed, 2 * rows, 1024), block.shape[1]), dtype=np.float32)
+            if rows:
+                buffer[:rows] = self.matrix
+            self._buffer = buffer
+        self._buffer[rows:needed] = block
+        self.matrix = self._buffer[:needed]
+
+    def _replace(self, name: str, writer) -> None:
+        # Write alongside and rename so readers never see a half-written file.
+        tmp = self.directory / f".{name}.tmp"
+        writer(tmp)
+        os.replace(tmp, self.directory / name)
+
+    def _bump_version(self) -> None:
+        self.state["version"] = self.state.get("version", 0) + 1
+        self._replace(STATE_FILE, lambda p: p.write_text(json.dumps(self.state)))
+
+    def _unlink(self, names: Iterable[str]) -> None:
+        for name in names:
+            path = self.directory / name
+            if path.exists():
+                path.unlink()
+
+    def compact(self) -> None:
+        """Fold appended segments into embeddings.npy and memory-map it again."""
+        with self._lock:
+            segments = self.state.get("segments")
+            if not segments:
+                return
+            matrix = self.matrix
+            self._replace(EMBEDDINGS_FILE, lambda p: _save(p, matrix))
+            self.state["segments"] = []
+            self.state["base_rows"] = matrix.shape[0]
+            self._replace(STATE_FILE, lambda p: p.write_text(json.dumps(self.state)))
+            self._unlink(segments)
+            self.matrix = np.load(self.directory / EMBEDDINGS_FILE, mmap_mode="r")
+            self._buffer = None
+
+    def close(self) -> None:
+        self.compact()
+        self.matrix = None
+        self._buffer = None
+
+    def ensure_schema(self, embedding_dim: int) -> None:
+        if self.matrix is not None and self.matrix.shape[1] != embedding_dim:
+            raise ValueError(
+                f"Index dimension {self.matrix.shape[1]} does not match {embedding_dim}"
+            )
+
+    def maintain_index(self, concurrently: bool = True) -> str | None:
+        return None
+
+    def corpus_version(self) -> int:
+        return int(self.state.get("version", 0))
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def add_documents(
+        self,
+        texts: Iterable[str],
+        metadatas: Iterable[dict],
+        embeddings: Iterable[Sequence[float]],
+        batch_size: int | None = None,
+        method: str | None = None,
+    ) -> int:
+        rows = zip(texts, metadatas, embeddings)
+        size = max(1, batch_size or settings.db_batch_size)
+        with self._lock:
+            blocks = []
+            new_records = []
+            while True:
+                batch = list(islice(rows, size))
+                if not batch:
+                    break
+                blocks.append(_normalize(np.asarray([b[2] for b in batch], dtype=np.float32)))
+                new_records.extend((b[0], b[1]) for b in batch)
+            if not new_records:
+                return 0
+            block = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+            if self.matrix is not None and self.matrix.shape[1] != block.shape[1]:
+                raise ValueError(
+                    f"Index dimension {self.matrix.shape[1]} does not match {block.shape[1]}"
+                )
+
+            segment = f"segment-{self.state.get('version', 0) + 1}.npy"
+            self._replace(segment, lambda p: _save(p, block))
+            records_path = self.directory / RECORDS_FILE
+            with records_path.open("r+b" if records_path.exists() else "wb") as handle:
+                # Bytes past records_bytes belong to an add that never committed.
+                end = self.state.get("records_bytes")
+                if end is None:
+                    handle.seek(0, os.SEEK_END)
+                else:
+                    handle.seek(end)
+                    handle.truncate()
+                for content, metadata in new_records:
+                    record = {"content": content, "metadata": metadata}
+                    handle.write((json.dumps(record) + "\n").encode("utf-8"))
+                self.state["records_bytes"] = handle.tell()
+            if not self.state.get("segments"):
+                self.state["base_rows"] = 0 if self.matrix is None else self.matrix.shape[0]
+            self.state["segments"] = self.state.get("segments", []) + [segment]
+            self._bump_version()
+
+            # Records first: a search that sees the new rows must find their text.
+            self.contents.extend(content for content, _ in new_records)
+            self.metadatas.extend(metadata or {} for _, metadata in new_records)
+            self._append_rows(block)
+        return len(new_records)
+
+    def clear_documents(self) -> None:
+        with self._lock:
+            self._unlink([EMBEDDINGS_FILE, RECORDS_FILE, *self.state.get("segments", [])])
+            for key in ("segments", "base_rows", "records_bytes"):
+                self.state.pop(key, None)
+            self._bump_version()
+            self._load()
+
+    def filter_values(self) -> Dict[str, List[str]]:
+        """Distinct values of each filterable attribute, for pickers."""
+        return {
+            key: sorted({str(m[key]) for m in self.metadatas if m.get(key)})
+            for key in ATTRIBUTE_KEYS
+            if key != "effective_date"
+        }
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        threshold: float | None,
+        with_vectors: bool = False,
+        filters: Dict | None = None,
+    ):
+        """Top-k rows by cosine similarity; see VectorStore.similarity_search."""
+        if not len(query_embedding) or self.matrix is None or not len(self.contents):
+            return ([], np.empty((0, 0), dtype=np.float32)) if with_vectors else []
+        metrics = get_metrics()
+        with metrics.timer("vector_search_seconds", backend="numpy", kind="vector") as span:
+            results, rows = self._search(query_embedding, top_k, threshold, filters)
+            span["rows_scanned"] = len(self.contents)
+            span["rows_returned"] = len(results)
+        metrics.inc(
+            "vector_search_rows_scanned_total", len(self.contents), backend="numpy", kind="vector"
+        )
+        metrics.inc(
+            "vector_search_rows_returned_total", len(results), backend="numpy", kind="vector"
+        )
+        if with_vectors:
+            return results, np.asarray(self.matrix[rows], dtype=np.float32)
+        return results
+
+    def _search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        threshold: float | None,
+        filters: Dict | None = None,
+    ) -> Tuple[List[Tuple[str, dict, float]], List[int]]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self.matrix @ query
+        k = min(top_k, scores.shape[0])
+        if filters:
+            mask = np.fromiter(
+                (matches_filters(m, filters) for m in self.metadatas), bool, len(self.metadatas)
+            )
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+            if not k:
+                return [], []
+        if k < scores.shape[0]:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.shape[0])
+        candidates = candidates[np.argsort(-scores[candidates])]
+        results = []
+        rows = []
+        for i in candidates:
+            score = float(scores[i])
+            if threshold is not None and threshold >= 0 and score < threshold:
+                break
+            results.append((self.contents[i], self.metadatas[i], score))
+            rows.append(int(i))
+        return results, rows
+
+
+def export_from_postgres(directory: str, batch_size: int = 5000) -> int:
+    """Snapshot the pgvector documents table into a NumpyVectorStore directory."""
+    from src.vector_store import VectorStore
+
+    store = VectorStore()
+    target = Path(directory)
+    target.mkdir(parents=True, exist_ok=True)
+    with store.pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*), MAX(vector_dims(embedding)) FROM documents;")
+            count, dim = cur.fetchone()
+        if not count:
+            return 0
+        matrix_tmp = target / f".{EMBEDDINGS_FILE}.tmp"
+        records_tmp = target / f".{RECORDS_FILE}.tmp"
+        matrix = np.lib.format.open_memmap(
+            matrix_tmp, mode="w+", dtype=np.float32, shape=(count, dim)
+        )
+        written = 0
+        # A named (server-side) cursor streams rows instead of loading the table.
+        with conn, conn.cursor(name="numpy_export") as cur, records_tmp.open(
+            "w", encoding="utf-8"
+        ) as records:
+            cur.itersize = batch_size
+            cur.execute("SELECT content, metadata, embedding FROM documents ORDER BY id;")
+            for rows in _fetch_batches(cur, batch_size):
+                block = np.asarray([r[2].to_numpy() for r in rows], dtype=np.float32)
+                matrix[written : written + len(rows)] = _normalize(block)
+                for content, metadata, _ in rows:
+                    if isinstance(metadata, str):
+                        metadata = json.loads(metadata)
+                    records.write(json.dumps({"content": content, "metadata": metadata}) + "\n")
+                written += len(rows)
+        matrix.flush()
+        del matrix
+    os.replace(matrix_tmp, target / EMBEDDINGS_FILE)
+    os.replace(records_tmp, target / RECORDS_FILE)
+    state_path = target / STATE_FILE
+    state = json.loads(state_path.read_text()) if state_path.exists() else {"version": 0}
+    segments = state.pop("segments", [])
+    state.pop("base_rows", None)
+    state["records_bytes"] = (target / RECORDS_FILE).stat().st_size
+    state["version"] = state.get("version", 0) + 1
+    state_path.write_text(json.dumps(state))
+    # The snapshot replaces everything, including rows appended since the last compact.
+    for name in segments:
+        (target / name).unlink(missing_ok=True)
+    return written
+
+
+def _fetch_batches(cur, size: int) -> Iterator[List[tuple]]:
+    while True:
+        rows = cur.fetchmany(size)
+        if not rows:
+            return
+        yield rows
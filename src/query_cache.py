@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from config import settings
+
+
+def normalize_question(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" ?!.")
+
+
+class QueryEmbeddingCache:
+    """Exact-match LRU of query embeddings keyed by normalized question text."""
+
+    def __init__(self, max_entries: int | None = None, ttl: float | None = None) -> None:
+        self.max_entries = settings.query_cache_size if max_entries is None else max_entries
+        self.ttl = settings.query_cache_ttl if ttl is None else ttl
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question: str) -> List[float] | None:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl > 0 and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, question: str, embedding: List[float]) -> None:
+        if self.max_entries <= 0 or not embedding:
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SemanticAnswerCache:
+    """Answers reused when a new question embeds within max_distance (cosine)."""
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+        max_distance: float | None = None,
+    ) -> None:
+        self.max_entries = settings.answer_cache_size if max_entries is None else max_entries
+        self.ttl = settings.answer_cache_ttl if ttl is None else ttl
+        self.max_distance = (
+            settings.answer_cache_max_distance if max_distance is None else max_distance
+        )
+        self._lock = threading.Lock()
+        self._vectors: np.ndarray | None = None
+        self._entries: List[dict] = []
+        self._corpus_version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync_version(self, corpus_version: int) -> None:
+        if self._corpus_version != corpus_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries = []
+            self._vectors = None
+            self._corpus_version = corpus_version
+
+    def _expire(self) -> None:
+        if self.ttl <= 0 or not self._entries:
+            return
+        cutoff = time.monotonic() - self.ttl
+        keep = [i for i, entry in enumerate(self._entries) if entry["created"] >= cutoff]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep] if keep else None
+
+    def get(self, embedding: Sequence[float], corpus_version: int) -> Dict | None:
+        if self.max_entries <= 0 or not len(embedding):
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            self._sync_version(corpus_version)
+            self._expire()
+            if self._vectors is None:
+                self.misses += 1
+                return None
+            similarities = self._vectors @ query
+            best = int(np.argmax(similarities))
+            if 1.0 - float(similarities[best]) > self.max_distance:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry = self._entries[best]
+            return {"answer": entry["answer"], "sources": entry["sources"]}
+
+    def put(
+        self, embedding: Sequence[float], answer: str, sources: list, corpus_version: int
+    ) -> None:
+        if self.max_entries <= 0 or not len(embedding):
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._sync_version(corpus_version)
+            self._entries.append(
+                {"answer": answer, "sources": sources, "created": time.monotonic()}
+            )
+            row = vector[np.newaxis, :]
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+            if len(self._entries) > self.max_entries:
+                # Entries are appended in insertion order, so the head is oldest.
+                drop = len(self._entries) - self.max_entries
+                self._entries = self._entries[drop:]
+                self._vectors = self._vectors[drop:]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "corpus_version": self._corpus_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class RetrievalCache:
+    """LRU/TTL of knowledge base results keyed by (kb id, query text, result count)."""
+
+    def __init__(self, max_entries: int | None = None, ttl: float | None = None) -> None:
+        self.max_entries = settings.kb_cache_size if max_entries is None else max_entries
+        self.ttl = settings.kb_cache_ttl if ttl is None else ttl
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(knowledge_base_id: str, query_text: str, max_results: int) -> tuple:
+        # Whitespace only: the KB embeds the raw text, so case may matter.
+        return knowledge_base_id, " ".join(query_text.split()), int(max_results)
+
+    def get(self, key: tuple) -> list | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl > 0 and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, key: tuple, results: list) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (list(results), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_embedding_cache: QueryEmbeddingCache | None = None
+_answer_cache: SemanticAnswerCache | None = None
+_caches_lock = threading.Lock()
+
+
+def get_query_caches() -> tuple[QueryEmbeddingCache, SemanticAnswerCache]:
+    global _embedding_cache, _answer_cache
+    if _embedding_cache is None:
+        with _caches_lock:
+            if _embedding_cache is None:
+                _answer_cache = SemanticAnswerCache()
+                _embedding_cache = QueryEmbeddingCache()
+    return _embedding_cache, _answer_cache
+
+
+_retrieval_cache: RetrievalCache | None = None
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        with _caches_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = RetrievalCache()
+    return _retrieval_cache
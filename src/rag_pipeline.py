@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
 
 from config import settings
+from src.context_builder import ContextReport, assemble_context
 from src.embeddings import EmbeddingsManager
 from src.llm import BedrockLLM
-from src.vector_store import VectorStore
+from src.metrics import get_metrics
+from src.mmr import mmr_select
+from src.query_cache import get_query_caches
+from src.vector_store import open_vector_store
 
 
 PROMPT_TEMPLATE = """
@@ -23,33 +29,230 @@ Answer with concise bullet points and include sources in brackets like [source].
 
 
 class RAGPipeline:
-    def __init__(self) -> None:
-        self.embeddings = EmbeddingsManager()
-        self.llm = BedrockLLM()
-        self.store = VectorStore()
-
-    def _build_context(self, results: List[tuple]) -> str:
-        context_parts = []
-        for content, metadata, similarity in results:
-            source = metadata.get("source") if isinstance(metadata, dict) else metadata
-            context_parts.append(f"Source: {source}\nSimilarity: {similarity:.3f}\n{content}")
-        return "\n\n".join(context_parts)
-
-    def answer_query(self, question: str) -> Dict:
-        query_embedding = self.embeddings.embed_text(question, is_query=True)
-        results = self.store.similarity_search(
-            query_embedding=query_embedding,
-            top_k=settings.similarity_top_k,
-            threshold=settings.similarity_threshold,
-        )
-        if not results:
-            results = self.store.similarity_search(
+    def __init__(
+        self,
+        embeddings: EmbeddingsManager | None = None,
+        llm: BedrockLLM | None = None,
+        store=None,
+    ) -> None:
+        self.embeddings = embeddings or EmbeddingsManager()
+        self.llm = llm or BedrockLLM()
+        self.store = store or open_vector_store()
+        self.query_cache, self.answer_cache = get_query_caches()
+        self.metrics = get_metrics()
+
+    def _build_context(self, results: List[tuple]) -> Tuple[str, ContextReport]:
+        return assemble_context(results)
+
+    def _embed_query(self, question: str) -> List[float]:
+        query_embedding = self.query_cache.get(question)
+        if query_embedding is None:
+            query_embedding = self.embeddings.embed_text(question, is_query=True)
+            self.query_cache.put(question, query_embedding)
+        return query_embedding
+
+    def _cached_answer(
+        self, query_embedding: List[float], filters: Dict | None = None
+    ) -> tuple[Dict | None, int]:
+        # Cached answers are keyed on the question alone, so scoped
+        # (filtered) questions neither read nor populate the cache.
+        if self.answer_cache.max_entries <= 0 or filters:
+            return None, 0
+        corpus_version = self.store.corpus_version()
+        return self.answer_cache.get(query_embedding, corpus_version), corpus_version
+
+    def _retrieve(
+        self, query_embedding: List[float], question: str, filters: Dict | None = None
+    ) -> List[tuple]:
+        # With MMR, over-fetch candidates (with their vectors) and diversify below.
+        diversify = settings.mmr_enabled
+        top_k = settings.similarity_top_k
+        fetch_k = max(top_k, settings.mmr_fetch_k) if diversify else top_k
+        if settings.retrieval_mode == "hybrid" and hasattr(self.store, "hybrid_search"):
+            found = self.store.hybrid_search(
                 query_embedding=query_embedding,
-                top_k=settings.similarity_top_k,
-                threshold=-1,
+                query_text=question,
+                top_k=fetch_k,
+                with_vectors=diversify,
+                filters=filters,
+            )
+        else:
+            found = self.store.similarity_search(
+                query_embedding=query_embedding,
+                top_k=fetch_k,
+                threshold=settings.similarity_threshold,
+                with_vectors=diversify,
+                filters=filters,
+            )
+            if not (found[0] if diversify else found):
+                found = self.store.similarity_search(
+                    query_embedding=query_embedding,
+                    top_k=fetch_k,
+                    threshold=-1,
+                    with_vectors=diversify,
+                    filters=filters,
+                )
+        if not diversify:
+            return found
+        results, vectors = found[0], found[1]
+        # Hybrid candidates come with their fused (RRF) scores; MMR keeps that
+        # ranking as relevance instead of re-scoring by cosine alone.
+        fused = found[2] if len(found) > 2 else None
+        with self.metrics.timer("rag_stage_seconds", stage="diversify") as span:
+            picks = mmr_select(
+                query_embedding,
+                vectors,
+                top_k,
+                lambda_mult=settings.mmr_lambda,
+                time_budget=settings.mmr_time_budget_ms / 1000,
+                relevance=fused,
+            )
+            span["candidates"] = len(results)
+        return [results[i] for i in picks]
+
+    def _build_prompt(self, question: str, results: List[tuple]) -> Tuple[str, ContextReport]:
+        context, report = self._build_context(results)
+        self.metrics.inc("context_tokens_total", report.context_tokens)
+        self.metrics.inc("context_tokens_saved_total", report.tokens_saved)
+        return PROMPT_TEMPLATE.format(question=question, context=context), report
+
+    @contextmanager
+    def _stage(self, name: str, timings: Dict[str, float]) -> Iterator[dict]:
+        with self.metrics.timer("rag_stage_seconds", stage=name) as span:
+            yield span
+        timings[name] = span["seconds"]
+
+    def _report(self, timings: Dict[str, float], result: Dict, results: int) -> None:
+        cached = result.get("cached", False)
+        time_to_first_token = result.get("time_to_first_token")
+        self.metrics.inc("rag_queries_total", cached=str(cached).lower())
+        if time_to_first_token is not None:
+            self.metrics.observe(
+                "rag_time_to_first_token_seconds", time_to_first_token, cached=str(cached).lower()
+            )
+        self.metrics.log(
+            "answer_query",
+            cached=cached,
+            results=results,
+            time_to_first_token=(
+                round(time_to_first_token, 6) if time_to_first_token is not None else None
+            ),
+            timings={k: round(v, 6) for k, v in timings.items()},
+            usage=result.get("usage", {}),
+            context=result.get("context", {}),
+        )
+
+    def answer_query(self, question: str, filters: Dict | None = None) -> Dict:
+        """Answer a question; "timings" maps each stage to its seconds.
+
+        filters scope retrieval, e.g. {"department": "it", "doc_type": "sop"};
+        see vector_store.filter_clause for the supported keys.
+        """
+        timings: Dict[str, float] = {}
+        with self._stage("total", timings):
+            result = self._answer_query(question, timings, filters)
+        self._report(timings, result, len(result["sources"]))
+        return {**result, "timings": timings}
+
+    def _answer_query(
+        self, question: str, timings: Dict[str, float], filters: Dict | None = None
+    ) -> Dict:
+        with self._stage("embed", timings):
+            query_embedding = self._embed_query(question)
+        with self._stage("cache_lookup", timings):
+            cached, corpus_version = self._cached_answer(query_embedding, filters)
+        if cached is not None:
+            return {**cached, "cached": True}
+        with self._stage("retrieve", timings) as span:
+            results = self._retrieve(query_embedding, question, filters)
+            span["rows_returned"] = len(results)
+        with self._stage("prompt", timings) as span:
+            prompt, context = self._build_prompt(question, results)
+            span["prompt_chars"] = len(prompt)
+            span["context_tokens_saved"] = context.tokens_saved
+        with self._stage("generate", timings) as span:
+            # Per call: the LLM is shared by every session using this pipeline.
+            usage: Dict = {}
+            answer = self.llm.generate(prompt, usage=usage)
+            span.update(usage)
+        sources = [r[1] for r in results]
+        if not filters:
+            self.answer_cache.put(query_embedding, answer, sources, corpus_version)
+        return {
+            "answer": answer,
+            "sources": sources,
+            "usage": usage,
+            "context": context.as_dict(),
+        }
+
+    def answer_query_stream(
+        self, question: str, filters: Dict | None = None
+    ) -> Iterator[Dict]:
+        """Yield {"type": "token"} events, then one {"type": "done"} with sources."""
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        with self._stage("embed", timings):
+            query_embedding = self._embed_query(question)
+        with self._stage("cache_lookup", timings):
+            cached, corpus_version = self._cached_answer(query_embedding, filters)
+        if cached is not None:
+            timings["total"] = time.perf_counter() - start
+            self._report(
+                timings,
+                {"cached": True, "time_to_first_token": timings["total"]},
+                len(cached["sources"]),
             )
-        context = self._build_context(results)
-        prompt = PROMPT_TEMPLATE.format(question=question, context=context)
-        answer = self.llm.generate(prompt)
+            yield {"type": "token", "text": cached["answer"]}
+            yield {
+                "type": "done",
+                **cached,
+                "cached": True,
+                "time_to_first_token": timings["total"],
+                "llm_time_to_first_token": None,
+                "timings": timings,
+            }
+            return
+        time_to_first_token = None
+        with self._stage("retrieve", timings) as span:
+            results = self._retrieve(query_embedding, question, filters)
+            span["rows_returned"] = len(results)
+        with self._stage("prompt", timings) as span:
+            prompt, context = self._build_prompt(question, results)
+            span["context_tokens_saved"] = context.tokens_saved
+        # Timed by hand: a span context must not stay open across yields.
+        generate_start = time.perf_counter()
+        parts = []
+        usage: Dict = {}
+        for text in self.llm.generate_stream(prompt, usage=usage):
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start
+            parts.append(text)
+            yield {"type": "token", "text": text}
+        timings["generate"] = time.perf_counter() - generate_start
+        timings["total"] = time.perf_counter() - start
+        self.metrics.observe("rag_stage_seconds", timings["generate"], stage="generate")
+        self.metrics.observe("rag_stage_seconds", timings["total"], stage="total")
+        answer = "".join(parts).strip()
         sources = [r[1] for r in results]
-        return {"answer": answer, "sources": sources}
+        llm_time_to_first_token = usage.pop("time_to_first_token", None)
+        if not filters:
+            self.answer_cache.put(query_embedding, answer, sources, corpus_version)
+        self._report(
+            timings,
+            {
+                "usage": usage,
+                "context": context.as_dict(),
+                "time_to_first_token": time_to_first_token,
+            },
+            len(results),
+        )
+        yield {
+            "type": "done",
+            "answer": answer,
+            "sources": sources,
+            "time_to_first_token": time_to_first_token,
+            "llm_time_to_first_token": llm_time_to_first_token,
+            "timings": timings,
+            "usage": usage,
+            "context": context.as_dict(),
+        }
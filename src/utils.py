@@ -2,24 +2,42 @@ from __future__ import annotations
 
 from typing import List, Tuple
 
-try:
-    from langchain_text_splitters import RecursiveCharacterTextSplitter
-except Exception:  # pragma: no cover
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-
 from config import settings
+from src.chunker import RecursiveChunker, page_for_offset, token_length_function
+from src.doc_metadata import document_attributes
 from src.document_loader import Document
 
 
-def chunk_documents(documents: List[Document]) -> Tuple[List[str], List[dict]]:
-    splitter = RecursiveCharacterTextSplitter(
+def get_chunker() -> RecursiveChunker:
+    unit = settings.chunk_length_unit.lower()
+    if unit not in ("chars", "tokens"):
+        raise ValueError(f"CHUNK_LENGTH_UNIT must be 'chars' or 'tokens', got {unit!r}")
+    return RecursiveChunker(
         chunk_size=settings.chunk_size,
         chunk_overlap=settings.chunk_overlap,
+        length_function=token_length_function() if unit == "tokens" else None,
     )
+
+
+def chunk_documents(
+    documents: List[Document], chunker: RecursiveChunker | None = None
+) -> Tuple[List[str], List[dict]]:
+    chunker = chunker or get_chunker()
     texts: List[str] = []
     metadatas: List[dict] = []
     for doc in documents:
-        chunks = splitter.split_text(doc.text)
-        texts.extend(chunks)
-        metadatas.extend([{"source": doc.source}] * len(chunks))
+        attributes = document_attributes(doc.source, doc.text)
+        for chunk in chunker.split(doc.text):
+            metadata = {
+                "source": doc.source,
+                **attributes,
+                "chunk_index": chunk.index,
+                "char_start": chunk.start,
+                "char_end": chunk.end,
+            }
+            if doc.page_starts:
+                metadata["page_start"] = page_for_offset(doc.page_starts, chunk.start)
+                metadata["page_end"] = page_for_offset(doc.page_starts, chunk.end - 1)
+            texts.append(chunk.text)
+            metadatas.append(metadata)
     return texts, metadatas
@@ -1,37 +1,332 @@
 from __future__ import annotations
 
+import io
 import json
-from typing import Iterable, List, Tuple
+import math
+import re
+import struct
+import sys
+import time
+from array import array
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
-import psycopg2
+import numpy as np
 from pgvector import Vector
-from pgvector.psycopg2 import register_vector
+from psycopg2 import errors as pg_errors
+from psycopg2.extras import execute_values
 
 from config import settings
+from src.db_pool import ConnectionPool, get_pool
+from src.doc_metadata import ATTRIBUTE_KEYS
+from src.metrics import get_metrics
+
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+
+
+def _binary_field(data: bytes | None) -> bytes:
+    if data is None:
+        return struct.pack("!i", -1)
+    return struct.pack("!i", len(data)) + data
+
+
+def _binary_vector(embedding: Sequence[float]) -> bytes:
+    # pgvector binary layout: int16 dim, int16 unused, dim big-endian float4.
+    if hasattr(embedding, "astype"):
+        return struct.pack("!hh", len(embedding), 0) + embedding.astype(">f4").tobytes()
+    values = array("f", embedding)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return struct.pack("!hh", len(values), 0) + values.tobytes()
+
+
+def _batched(rows: Iterable[tuple], size: int) -> Iterable[List[tuple]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+INDEX_NAME = "documents_embedding_idx"
+QUANTIZATIONS = ("none", "halfvec", "binary")
+
+# Filter keys backed by a btree-indexed column (or expression).
+FILTER_COLUMNS = {
+    "source": "metadata->>'source'",
+    "doc_type": "doc_type",
+    "department": "department",
+}
+
+
+def recommended_lists(rows: int) -> int:
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond.
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def _parse_lists(definition: str) -> int | None:
+    match = re.search(r"lists\s*=\s*'?(\d+)", definition)
+    return int(match.group(1)) if match else None
+
+
+def _parse_quantization(definition: str) -> Tuple[str, int | None]:
+    if "binary_quantize" in definition:
+        quantization = "binary"
+    elif "halfvec" in definition:
+        quantization = "halfvec"
+    else:
+        return "none", None
+    match = re.search(r"(?:halfvec|bit)\((\d+)\)", definition)
+    return quantization, int(match.group(1)) if match else None
+
+
+def _index_state(index_type: str | None, definition: str | None) -> Dict:
+    quantization, dim = _parse_quantization(definition or "")
+    return {
+        "type": index_type,
+        "lists": _parse_lists(definition) if definition else None,
+        "quantization": quantization,
+        "dim": dim,
+    }
+
+
+def _index_expression(quantization: str, dim: int | None) -> str:
+    if quantization == "halfvec":
+        return f"(embedding::halfvec({int(dim)})) halfvec_cosine_ops"
+    if quantization == "binary":
+        return f"(binary_quantize(embedding)::bit({int(dim)})) bit_hamming_ops"
+    return "embedding vector_cosine_ops"
+
+
+def _shortlist(state: Dict, top_k: int) -> int:
+    if state["quantization"] == "none":
+        return top_k
+    return top_k * max(1, settings.vector_rerank_factor)
+
+
+def _candidate_source(state: Dict, where: str = "", strategy: str = "ann") -> str:
+    """FROM-clause source for ranking rows by full-precision distance.
+
+    With a quantized index this is the %(shortlist)s nearest rows by the
+    compact index expression; the caller re-ranks them with embedding <=> q.
+    A filter (where) is applied inside the subquery. strategy="exact" reads
+    the matching rows without the ANN index, for filters that match few rows.
+    """
+    columns = "id, content, metadata, embedding"
+    if strategy == "exact":
+        # OFFSET 0 keeps the planner from ordering through the ANN index.
+        return f"(SELECT {columns} FROM documents WHERE {where or 'true'} OFFSET 0) AS documents"
+    dim = state["dim"]
+    if state["quantization"] == "halfvec":
+        order = f"embedding::halfvec({dim}) <=> %(embedding)s::vector::halfvec({dim})"
+    elif state["quantization"] == "binary":
+        order = f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize(%(embedding)s::vector)"
+    elif where:
+        # Relaxed-order iterative scans return nearly sorted rows; re-sort outside.
+        order = "embedding <=> %(embedding)s"
+    else:
+        return "documents"
+    return (
+        f"(SELECT {columns} FROM documents {'WHERE ' + where if where else ''} "
+        f"ORDER BY {order} LIMIT %(shortlist)s) AS documents"
+    )
+
+
+def normalize_filters(filters: Dict | None) -> Dict | None:
+    """Collapse one-element value lists (as UI pickers send) to scalars, so
+    they match a partial index and plan as plain equality."""
+    if not filters:
+        return filters
+    normalized = {}
+    for key, value in filters.items():
+        if isinstance(value, (list, tuple, set)) and len(value) == 1:
+            value = next(iter(value))
+        normalized[key] = value
+    return normalized
+
+
+def filter_clause(filters: Dict | None) -> Tuple[str, Dict]:
+    """SQL predicate and params for a search filters dict.
+
+    source / doc_type / department take one value or a list of values;
+    effective_from / effective_to bound effective_date (ISO dates,
+    inclusive); any other key must equal its value in metadata, which the
+    GIN index on metadata serves.
+    """
+    if not filters:
+        return "", {}
+    clauses: List[str] = []
+    params: Dict = {}
+    contains: Dict = {}
+    for i, (key, value) in enumerate(sorted(filters.items())):
+        name = f"filter_{i}"
+        if key in FILTER_COLUMNS:
+            column = FILTER_COLUMNS[key]
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} = ANY(%({name})s)")
+                params[name] = sorted(str(v) for v in value)
+            else:
+                clauses.append(f"{column} = %({name})s")
+                params[name] = str(value)
+        elif key == "effective_from":
+            clauses.append(f"effective_date >= %({name})s")
+            params[name] = str(value)
+        elif key == "effective_to":
+            clauses.append(f"effective_date <= %({name})s")
+            params[name] = str(value)
+        else:
+            contains[key] = value
+    if contains:
+        clauses.append("metadata @> %(filter_metadata)s::jsonb")
+        params["filter_metadata"] = json.dumps(contains)
+    return " AND ".join(clauses), params
+
+
+def _partial_predicate(definition: str) -> Tuple[str, str] | None:
+    match = re.search(r"WHERE \(?(\w+) = '((?:[^']|'')*)'::text\)?", definition)
+    return (match.group(1), match.group(2).replace("''", "'")) if match else None
+
+
+def _ts_config() -> str:
+    name = settings.text_search_config
+    if not re.fullmatch(r"\w+", name):
+        raise ValueError(f"Invalid text search configuration: {name}")
+    return f"'{name}'::regconfig"
+
+
+def search_params(index_type: str, lists: int | None, top_k: int) -> Dict[str, int]:
+    """Map VECTOR_RECALL_TARGET onto ivfflat.probes / hnsw.ef_search.
+
+    A target of 0.9 maps to pgvector's suggested starting points
+    (sqrt(lists) probes, ef_search 40); each step closer to 1.0 scales the
+    work up by 0.1 / (1 - target).
+    """
+    target = min(max(settings.vector_recall_target, 0.5), 0.999)
+    scale = 0.1 / (1.0 - target)
+    if index_type == "ivfflat" and lists:
+        return {"ivfflat.probes": max(1, min(lists, math.ceil(math.sqrt(lists) * scale)))}
+    if index_type == "hnsw":
+        return {"hnsw.ef_search": max(top_k, min(1000, round(40 * scale)))}
+    return {}
+
+
+# Live definition of the main ANN index, for _index_state.
+INDEX_STATE_SQL = """
+    SELECT am.amname, pg_get_indexdef(ic.oid)
+    FROM pg_class ic JOIN pg_am am ON am.oid = ic.relam
+    WHERE ic.relname = %(index)s AND pg_table_is_visible(ic.oid);
+"""
+
+
+def search_settings(state: Dict, top_k: int, selectivity: float = 1.0) -> Dict[str, int]:
+    """ivfflat.probes / hnsw.ef_search values to SET LOCAL for one search."""
+    candidates = _shortlist(state, top_k)
+    values = {}
+    for name, value in search_params(state["type"], state["lists"], candidates).items():
+        if selectivity < 1.0:
+            # Post-filtering keeps ~selectivity of what the index yields.
+            limit = state["lists"] if name == "ivfflat.probes" else 1000
+            value = min(limit, max(value, math.ceil(value / selectivity)))
+        values[name] = int(value)
+    return values
+
+
+def similarity_statement(
+    state: Dict,
+    top_k: int,
+    threshold: float | None = None,
+    with_vectors: bool = False,
+    source: str | None = None,
+) -> Tuple[str, Dict]:
+    """SQL and params (all but %(embedding)s) for a top-k cosine search.
+
+    Shared by VectorStore and the asyncpg store so both run the statement
+    the index was built for; source defaults to the unfiltered candidates.
+    """
+    columns = "content, metadata, 1 - (embedding <=> %(embedding)s) AS similarity"
+    if with_vectors:
+        columns += ", embedding"
+    where = ""
+    if threshold is not None and threshold >= 0:
+        where = "WHERE 1 - (embedding <=> %(embedding)s) >= %(threshold)s"
+    sql = f"""
+        SELECT {columns}
+        FROM {source or _candidate_source(state)}
+        {where}
+        ORDER BY embedding <=> %(embedding)s
+        LIMIT %(top_k)s;
+    """
+    return sql, {"threshold": threshold, "top_k": top_k, "shortlist": _shortlist(state, top_k)}
+
+
+def parse_rows(rows: Iterable[tuple]) -> List[Tuple[str, dict, float]]:
+    results = []
+    for content, metadata, similarity in rows:
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except json.JSONDecodeError:
+                metadata = {"source": metadata}
+        results.append((content, metadata or {}, float(similarity)))
+    return results
+
+
+def _parse_rows_with_vectors(rows: List[tuple]) -> Tuple[List[Tuple[str, dict, float]], np.ndarray]:
+    results = parse_rows(row[:3] for row in rows)
+    if not rows:
+        return results, np.empty((0, 0), dtype=np.float32)
+    # Depending on the pgvector version, vectors arrive as Vector or ndarray.
+    vectors = [row[3].to_numpy() if isinstance(row[3], Vector) else row[3] for row in rows]
+    return results, np.asarray(vectors, dtype=np.float32)
+
+
+def _fresh(cached_at: float) -> bool:
+    return time.monotonic() - cached_at < settings.vector_index_state_ttl
 
 
 class VectorStore:
-    def __init__(self) -> None:
-        self.conn = psycopg2.connect(
-            host=settings.db_host,
-            port=settings.db_port,
-            dbname=settings.db_name,
-            user=settings.db_user,
-            password=settings.db_password,
-        )
-        self._ensure_extension()
-        register_vector(self.conn)
+    _bookkeeping_ready = False
+    # Index state read from the catalog. Another process can rebuild or drop
+    # the index, so entries are re-read after VECTOR_INDEX_STATE_TTL seconds.
+    _index_cache: Dict | None = None
+    _index_cached_at = 0.0
+    _partial_cache: Dict | None = None
+    _partial_cached_at = 0.0
+    _pgvector: Tuple[int, ...] | None = None
+
+    def __init__(self, pool: ConnectionPool | None = None) -> None:
+        self.pool = pool or get_pool()
 
-    def _ensure_extension(self) -> None:
-        with self.conn, self.conn.cursor() as cur:
-            cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+    @contextmanager
+    def _cursor(self) -> Iterator:
+        # Borrow a pooled connection for one transaction and hand it back.
+        with self.pool.connection() as conn:
+            with conn, conn.cursor() as cur:
+                yield cur
+
+    @contextmanager
+    def _autocommit_cursor(self) -> Iterator:
+        # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+        with self.pool.connection() as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    yield cur
+            finally:
+                conn.autocommit = False
 
     def close(self) -> None:
-        self.conn.close()
+        # Connections are returned to the pool after every operation.
+        pass
 
     def ensure_schema(self, embedding_dim: int) -> None:
-        with self.conn, self.conn.cursor() as cur:
-            cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        with self._cursor() as cur:
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS documents (
@@ -43,70 +338,854 @@ class VectorStore:
                 """,
                 (embedding_dim,),
             )
+            # Generated tsvector column + GIN index back the lexical half of
+            # hybrid_search; ADD COLUMN IF NOT EXISTS upgrades older tables.
             cur.execute(
+                f"""
+                ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector({_ts_config()}, content)) STORED;
                 """
-                CREATE INDEX IF NOT EXISTS documents_embedding_idx
-                ON documents USING ivfflat (embedding vector_cosine_ops);
+            )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS documents_content_tsv_idx
+                ON documents USING gin (content_tsv);
                 """
             )
+            if settings.vector_index_type == "hnsw":
+                # HNSW needs no training data, so it can exist from the start.
+                # IVFFlat is deferred to maintain_index() once rows are loaded.
+                self._check_quantization(cur, settings.vector_quantization)
+                cur.execute(
+                    self._index_ddl(
+                        INDEX_NAME,
+                        "hnsw",
+                        0,
+                        quantization=settings.vector_quantization,
+                        dim=embedding_dim,
+                    )
+                )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS documents_source_idx
+                ON documents ((metadata->>'source'));
+                """
+            )
+            # Hot metadata keys as generated columns with btree indexes, plus a
+            # GIN index for equality on any other key. effective_date stays ISO
+            # text: text -> date casts are not immutable, and ISO sorts correctly.
+            cur.execute(
+                """
+                ALTER TABLE documents
+                    ADD COLUMN IF NOT EXISTS doc_type TEXT
+                        GENERATED ALWAYS AS (metadata->>'doc_type') STORED,
+                    ADD COLUMN IF NOT EXISTS department TEXT
+                        GENERATED ALWAYS AS (metadata->>'department') STORED,
+                    ADD COLUMN IF NOT EXISTS effective_date TEXT
+                        GENERATED ALWAYS AS (metadata->>'effective_date') STORED;
+                """
+            )
+            for column in ("doc_type", "department", "effective_date"):
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS documents_{column}_idx ON documents ({column});"
+                )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS documents_metadata_idx
+                ON documents USING gin (metadata jsonb_path_ops);
+                """
+            )
+        self.ensure_manifest()
+
+    def ensure_manifest(self) -> None:
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingest_manifest (
+                    source TEXT PRIMARY KEY,
+                    size BIGINT NOT NULL,
+                    mtime DOUBLE PRECISION NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS corpus_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version BIGINT NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                """
+            )
+        VectorStore._bookkeeping_ready = True
+
+    def _bump_version(self, cur) -> None:
+        # Lets query caches notice that the corpus changed after an ingest.
+        cur.execute(
+            """
+            INSERT INTO corpus_state (id, version) VALUES (1, 1)
+            ON CONFLICT (id) DO UPDATE SET
+                version = corpus_state.version + 1,
+                updated_at = now();
+            """
+        )
+
+    def corpus_version(self) -> int:
+        if not VectorStore._bookkeeping_ready:
+            self.ensure_manifest()
+        with self._cursor() as cur:
+            cur.execute("SELECT version FROM corpus_state WHERE id = 1;")
+            row = cur.fetchone()
+        return row[0] if row else 0
 
     def add_documents(
-        self, texts: Iterable[str], metadatas: Iterable[dict], embeddings: Iterable[List[float]]
-    ) -> None:
-        with self.conn, self.conn.cursor() as cur:
-            for text, meta, embedding in zip(texts, metadatas, embeddings):
+        self,
+        texts: Iterable[str],
+        metadatas: Iterable[dict],
+        embeddings: Iterable[Sequence[float]],
+        batch_size: int | None = None,
+        method: str | None = None,
+    ) -> int:
+        size = max(1, batch_size or settings.db_batch_size)
+        method = method or settings.db_write_method
+        rows = zip(texts, metadatas, embeddings)
+        with self._cursor() as cur:
+            written = self._write_rows(cur, rows, size, method)
+            self._bump_version(cur)
+        return written
+
+    def _write_rows(self, cur, rows: Iterable[tuple], size: int, method: str) -> int:
+        written = 0
+        for batch in _batched(rows, size):
+            if method == "values":
+                self._insert_values(cur, batch)
+            else:
+                self._copy_binary(cur, batch)
+            written += len(batch)
+        return written
+
+    def _copy_binary(self, cur, batch: List[tuple]) -> None:
+        buffer = io.BytesIO()
+        buffer.write(_COPY_HEADER)
+        for text, meta, embedding in batch:
+            buffer.write(struct.pack("!h", 3))
+            buffer.write(_binary_field(text.encode("utf-8")))
+            # jsonb binary format is a version byte followed by the JSON text.
+            buffer.write(_binary_field(b"\x01" + json.dumps(meta).encode("utf-8")))
+            buffer.write(_binary_field(_binary_vector(embedding)))
+        buffer.write(_COPY_TRAILER)
+        buffer.seek(0)
+        cur.copy_expert(
+            "COPY documents (content, metadata, embedding) FROM STDIN WITH (FORMAT BINARY);",
+            buffer,
+        )
+
+    def _insert_values(self, cur, batch: List[tuple]) -> None:
+        execute_values(
+            cur,
+            "INSERT INTO documents (content, metadata, embedding) VALUES %s;",
+            [(text, json.dumps(meta), Vector(list(embedding))) for text, meta, embedding in batch],
+            template="(%s, %s::jsonb, %s)",
+            page_size=len(batch),
+        )
+
+    def get_manifest(self) -> Dict[str, dict]:
+        with self._cursor() as cur:
+            cur.execute("SELECT source, size, mtime, content_hash, chunks FROM ingest_manifest;")
+            rows = cur.fetchall()
+        return {
+            source: {"size": size, "mtime": mtime, "content_hash": content_hash, "chunks": chunks}
+            for source, size, mtime, content_hash, chunks in rows
+        }
+
+    def replace_source(
+        self,
+        source: str,
+        size: int,
+        mtime: float,
+        content_hash: str,
+        texts: Sequence[str],
+        metadatas: Sequence[dict],
+        embeddings: Iterable[Sequence[float]],
+    ) -> int:
+        return self.replace_sources(
+            [(source, size, mtime, content_hash, texts, metadatas, embeddings)]
+        )
+
+    def replace_sources(
+        self, items: Sequence[tuple], aliases: Sequence[Tuple[str, int, str]] = ()
+    ) -> int:
+        """Replace chunks and manifest rows for several sources in one commit.
+
+        Each item is (source, size, mtime, content_hash, texts, metadatas,
+        embeddings). Delete, rewrite and record happen in one transaction so
+        a failed run never leaves a source half-replaced. aliases are
+        (source, chunk_index, alias source) for chunks of other files that
+        were skipped as duplicates of the stored chunk.
+        """
+        total = 0
+        with self._cursor() as cur:
+            self._strip_aliases(cur, [item[0] for item in items])
+            for source, size, mtime, content_hash, texts, metadatas, embeddings in items:
+                cur.execute("DELETE FROM documents WHERE metadata->>'source' = %s;", (source,))
+                written = self._write_rows(
+                    cur,
+                    zip(texts, metadatas, embeddings),
+                    max(1, settings.db_batch_size),
+                    settings.db_write_method,
+                )
                 cur.execute(
                     """
-                    INSERT INTO documents (content, metadata, embedding)
-                    VALUES (%s, %s, %s);
+                    INSERT INTO ingest_manifest (source, size, mtime, content_hash, chunks)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (source) DO UPDATE SET
+                        size = EXCLUDED.size,
+                        mtime = EXCLUDED.mtime,
+                        content_hash = EXCLUDED.content_hash,
+                        chunks = EXCLUDED.chunks,
+                        ingested_at = now();
                     """,
-                    (text, json.dumps(meta), embedding),
+                    (source, size, mtime, content_hash, written),
                 )
+                total += written
+            self._add_aliases(cur, aliases)
+            self._bump_version(cur)
+        return total
+
+    def _add_aliases(self, cur, aliases: Sequence[Tuple[str, int, str]]) -> None:
+        grouped: Dict[Tuple[str, int], set] = {}
+        for source, index, alias in aliases:
+            grouped.setdefault((source, index), set()).add(alias)
+        if not grouped:
+            return
+        execute_values(
+            cur,
+            """
+            UPDATE documents d SET metadata = jsonb_set(
+                d.metadata,
+                '{aliases}',
+                (
+                    SELECT jsonb_agg(DISTINCT a ORDER BY a)
+                    FROM jsonb_array_elements_text(
+                        COALESCE(d.metadata->'aliases', '[]'::jsonb) || v.aliases
+                    ) a
+                )
+            )
+            FROM (VALUES %s) AS v(source, chunk_index, aliases)
+            WHERE d.metadata->>'source' = v.source
+              AND (d.metadata->>'chunk_index')::int = v.chunk_index;
+            """,
+            [
+                (source, index, json.dumps(sorted(names)))
+                for (source, index), names in grouped.items()
+            ],
+            template="(%s, %s, %s::jsonb)",
+        )
+
+    def _strip_aliases(self, cur, sources: Sequence[str]) -> None:
+        # A replaced or removed file no longer backs the chunks naming it.
+        for source in sources:
+            cur.execute(
+                """
+                UPDATE documents
+                SET metadata = CASE
+                    WHEN (metadata->'aliases') - %(source)s = '[]'::jsonb
+                        THEN metadata - 'aliases'
+                    ELSE jsonb_set(metadata, '{aliases}', (metadata->'aliases') - %(source)s)
+                END
+                WHERE metadata @> jsonb_build_object(
+                    'aliases', jsonb_build_array(%(source)s::text)
+                );
+                """,
+                {"source": source},
+            )
+
+    def alias_sources(self, sources: Sequence[str]) -> List[str]:
+        """Files whose duplicate chunks were folded into chunks of sources."""
+        if not sources:
+            return []
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                SELECT DISTINCT jsonb_array_elements_text(metadata->'aliases')
+                FROM documents
+                WHERE metadata->>'source' = ANY(%s) AND metadata ? 'aliases';
+                """,
+                (list(sources),),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def chunk_signatures(
+        self, exclude: Sequence[str] = (), with_content: bool = False
+    ) -> List[tuple]:
+        """(source, chunk_index, content_hash, simhash, content, *attributes) of stored chunks.
+
+        For dedup; attributes follow ATTRIBUTE_KEYS, and content is only read
+        with with_content (near-duplicate checks need it).
+        """
+        attributes = ", ".join(f"metadata->>'{key}'" for key in ATTRIBUTE_KEYS)
+        with self._cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT metadata->>'source', (metadata->>'chunk_index')::int,
+                       metadata->>'content_hash', metadata->>'simhash',
+                       CASE WHEN %(with_content)s THEN content END, {attributes}
+                FROM documents
+                WHERE metadata ? 'content_hash' AND metadata ? 'simhash'
+                  AND NOT (metadata->>'source' = ANY(%(exclude)s))
+                ORDER BY id;
+                """,
+                {"exclude": list(exclude), "with_content": with_content},
+            )
+            return cur.fetchall()
+
+    def touch_source(self, source: str, size: int, mtime: float) -> None:
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE ingest_manifest SET size = %s, mtime = %s WHERE source = %s;",
+                (size, mtime, source),
+            )
+
+    def remove_sources(self, sources: Sequence[str]) -> int:
+        if not sources:
+            return 0
+        with self._cursor() as cur:
+            self._strip_aliases(cur, sources)
+            cur.execute(
+                "DELETE FROM documents WHERE metadata->>'source' = ANY(%s);", (list(sources),)
+            )
+            removed = cur.rowcount
+            cur.execute("DELETE FROM ingest_manifest WHERE source = ANY(%s);", (list(sources),))
+            self._bump_version(cur)
+        return removed
 
     def clear_documents(self) -> None:
-        with self.conn, self.conn.cursor() as cur:
+        self.ensure_manifest()
+        with self._cursor() as cur:
             cur.execute("TRUNCATE TABLE documents;")
+            cur.execute("TRUNCATE TABLE ingest_manifest;")
+            self._bump_version(cur)
 
-    def similarity_search(
-        self, query_embedding: List[float], top_k: int, threshold: float | None
-    ) -> List[Tuple[str, dict, float]]:
-        if not query_embedding:
-            return []
-        with self.conn.cursor() as cur:
-            if threshold is None or threshold < 0:
+    def _pgvector_version(self, cur) -> Tuple[int, ...]:
+        if VectorStore._pgvector is None:
+            cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector';")
+            row = cur.fetchone()
+            VectorStore._pgvector = (
+                tuple(int(part) for part in re.findall(r"\d+", row[0])[:3]) if row else ()
+            )
+        return VectorStore._pgvector
+
+    def _check_quantization(self, cur, quantization: str) -> None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unsupported vector quantization: {quantization}")
+        if quantization == "none":
+            return
+        version = self._pgvector_version(cur)
+        if version < (0, 7):
+            raise RuntimeError(
+                f"VECTOR_QUANTIZATION={quantization} needs pgvector 0.7 or newer "
+                f"(installed: {'.'.join(map(str, version)) or 'none'})"
+            )
+
+    def _embedding_dim(self, cur) -> int:
+        cur.execute(
+            """
+            SELECT atttypmod FROM pg_attribute
+            WHERE attrelid = 'documents'::regclass AND attname = 'embedding';
+            """
+        )
+        return cur.fetchone()[0]
+
+    def _index_ddl(
+        self,
+        name: str,
+        index_type: str,
+        rows: int,
+        concurrently: bool = False,
+        quantization: str = "none",
+        dim: int | None = None,
+        where: str = "",
+    ) -> str:
+        prefix = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+        expression = _index_expression(quantization, dim)
+        predicate = f" WHERE {where}" if where else ""
+        if index_type == "hnsw":
+            return (
+                f"{prefix} IF NOT EXISTS {name} ON documents "
+                f"USING hnsw ({expression}) "
+                f"WITH (m = {int(settings.hnsw_m)}, "
+                f"ef_construction = {int(settings.hnsw_ef_construction)}){predicate};"
+            )
+        if index_type == "ivfflat":
+            return (
+                f"{prefix} IF NOT EXISTS {name} ON documents "
+                f"USING ivfflat ({expression}) "
+                f"WITH (lists = {recommended_lists(rows)}){predicate};"
+            )
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    def index_info(self) -> Dict | None:
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                SELECT am.amname, pg_get_indexdef(i.indexrelid), i.indisvalid,
+                       pg_relation_size(i.indexrelid)
+                FROM pg_index i
+                JOIN pg_class ic ON ic.oid = i.indexrelid
+                JOIN pg_am am ON am.oid = ic.relam
+                JOIN pg_class c ON c.oid = i.indrelid
+                WHERE ic.relname = %s AND c.relname = 'documents'
+                  AND pg_table_is_visible(ic.oid);
+                """,
+                (INDEX_NAME,),
+            )
+            row = cur.fetchone()
+            cur.execute("SELECT COUNT(*) FROM documents;")
+            (rows,) = cur.fetchone()
+            partial = self._load_partial_indexes(cur)
+        if row is None:
+            VectorStore.remember_index_state(None)
+            return None
+        index_type, definition, valid, size = row
+        state = _index_state(index_type, definition)
+        lists = state["lists"]
+        info = {
+            "name": INDEX_NAME,
+            "type": index_type,
+            "definition": definition,
+            "valid": valid,
+            "size_bytes": size,
+            "rows": rows,
+            "lists": lists,
+            "recommended_lists": recommended_lists(rows) if index_type == "ivfflat" else None,
+            "quantization": state["quantization"],
+            "dimensions": state["dim"],
+            "rerank_candidates": _shortlist(state, settings.similarity_top_k),
+            "search_params": search_params(
+                index_type, lists, _shortlist(state, settings.similarity_top_k)
+            ),
+            "partial_indexes": [
+                {"column": column, "value": value, **entry}
+                for (column, value), entry in sorted(partial.items())
+            ],
+        }
+        VectorStore.remember_index_state((index_type, definition))
+        return info
+
+    def build_index(
+        self,
+        index_type: str | None = None,
+        concurrently: bool = False,
+        quantization: str | None = None,
+    ) -> Dict:
+        """(Re)build the ANN index sized to the current row count.
+
+        With concurrently=True the replacement is built alongside the live
+        index and swapped in, so searches keep working during the rebuild.
+        quantization ("none", "halfvec", "binary") picks what the index
+        stores; the table keeps full-precision vectors for re-ranking, so
+        switching modes is just a rebuild.
+        """
+        index_type = index_type or settings.vector_index_type
+        quantization = quantization or settings.vector_quantization
+        with self._cursor() as cur:
+            self._check_quantization(cur, quantization)
+            dim = self._embedding_dim(cur)
+            cur.execute("SELECT COUNT(*) FROM documents;")
+            (rows,) = cur.fetchone()
+        if concurrently:
+            staging = f"{INDEX_NAME}_rebuild"
+            with self._autocommit_cursor() as cur:
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {staging};")
                 cur.execute(
-                    """
-                    SELECT content, metadata, 1 - (embedding <=> %s) AS similarity
-                    FROM documents
-                    ORDER BY embedding <=> %s
-                    LIMIT %s;
-                    """,
-                    (Vector(query_embedding), Vector(query_embedding), top_k),
+                    self._index_ddl(
+                        staging, index_type, rows, True, quantization=quantization, dim=dim
+                    )
                 )
-            else:
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME};")
+                cur.execute(f"ALTER INDEX {staging} RENAME TO {INDEX_NAME};")
+        else:
+            with self._cursor() as cur:
+                cur.execute(f"DROP INDEX IF EXISTS {INDEX_NAME};")
                 cur.execute(
-                    """
-                    SELECT content, metadata, 1 - (embedding <=> %s) AS similarity
-                    FROM documents
-                    WHERE 1 - (embedding <=> %s) >= %s
-                    ORDER BY embedding <=> %s
-                    LIMIT %s;
-                    """,
-                    (
-                        Vector(query_embedding),
-                        Vector(query_embedding),
-                        threshold,
-                        Vector(query_embedding),
-                        top_k,
-                    ),
+                    self._index_ddl(
+                        INDEX_NAME, index_type, rows, quantization=quantization, dim=dim
+                    )
                 )
-            rows = cur.fetchall()
-        results = []
-        for content, metadata, similarity in rows:
-            if isinstance(metadata, str):
-                try:
-                    metadata = json.loads(metadata)
-                except json.JSONDecodeError:
-                    metadata = {"source": metadata}
-            results.append((content, metadata or {}, float(similarity)))
+        with self._cursor() as cur:
+            cur.execute("ANALYZE documents;")
+        return self.index_info() or {}
+
+    def maintain_index(self, concurrently: bool = True) -> str | None:
+        """Create or resize the ANN index after an ingest; returns what was done."""
+        index_type = settings.vector_index_type
+        if index_type == "none":
+            return None
+        info = self.index_info()
+        quantization = settings.vector_quantization
+        if (
+            info is None
+            or info["type"] != index_type
+            or info["quantization"] != quantization
+            or not info["valid"]
+        ):
+            self.build_index(index_type, concurrently=concurrently and info is not None)
+            if quantization != "none":
+                return f"built {index_type} index over {quantization} vectors"
+            return f"built {index_type} index"
+        if index_type == "ivfflat":
+            current, wanted = info["lists"] or 1, info["recommended_lists"]
+            # IVFFlat centroids are fixed at build time; rebuild once the table
+            # has grown or shrunk enough that the list count is clearly off.
+            if wanted > current * 2 or wanted * 2 < current:
+                self.build_index(index_type, concurrently=concurrently)
+                return f"rebuilt ivfflat index (lists {current} -> {wanted})"
+        return None
+
+    def partial_indexes(self) -> Dict[Tuple[str, str], Dict]:
+        """Partial ANN indexes keyed by the (column, value) they cover."""
+        with self._cursor() as cur:
+            return self._load_partial_indexes(cur)
+
+    def _load_partial_indexes(self, cur) -> Dict[Tuple[str, str], Dict]:
+        cur.execute(
+            """
+            SELECT ic.relname, am.amname, pg_get_indexdef(i.indexrelid),
+                   pg_relation_size(i.indexrelid)
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            JOIN pg_class c ON c.oid = i.indrelid
+            WHERE c.relname = 'documents' AND pg_table_is_visible(c.oid)
+              AND i.indpred IS NOT NULL AND am.amname IN ('hnsw', 'ivfflat');
+            """
+        )
+        partial = {}
+        for name, index_type, definition, size in cur.fetchall():
+            predicate = _partial_predicate(definition)
+            if predicate:
+                partial[predicate] = {
+                    "name": name,
+                    "size_bytes": size,
+                    **_index_state(index_type, definition),
+                }
+        VectorStore._partial_cache = partial
+        VectorStore._partial_cached_at = time.monotonic()
+        return partial
+
+    def build_partial_index(
+        self, column: str, value: str, index_type: str | None = None
+    ) -> Dict:
+        """Build an ANN index over only the rows where column = value.
+
+        Searches filtered on exactly that value then walk a small index that
+        holds nothing but matching rows, instead of post-filtering the full one.
+        """
+        if column not in ("doc_type", "department"):
+            raise ValueError(f"Partial indexes are supported on doc_type or department, not {column}")
+        index_type = index_type or settings.vector_index_type
+        quantization = settings.vector_quantization
+        slug = re.sub(r"\W+", "_", value.lower()).strip("_")
+        name = f"{INDEX_NAME}_{column}_{slug}"[:63]
+        where = f"{column} = '{value.replace(chr(39), chr(39) * 2)}'"
+        with self._cursor() as cur:
+            self._check_quantization(cur, quantization)
+            dim = self._embedding_dim(cur)
+            cur.execute(f"SELECT COUNT(*) FROM documents WHERE {where};")
+            (rows,) = cur.fetchone()
+        with self._autocommit_cursor() as cur:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+            cur.execute(
+                self._index_ddl(
+                    name, index_type, rows, True, quantization=quantization, dim=dim, where=where
+                )
+            )
+        with self._cursor() as cur:
+            partial = self._load_partial_indexes(cur)
+        return {"rows": rows, **partial.get((column, value), {})}
+
+    def drop_partial_index(self, column: str, value: str) -> bool:
+        with self._cursor() as cur:
+            info = self._load_partial_indexes(cur).get((column, value))
+        if info is None:
+            return False
+        with self._autocommit_cursor() as cur:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {info['name']};")
+        VectorStore._partial_cache = None
+        return True
+
+    def _estimate_rows(self, cur, where: str, params: Dict) -> float:
+        cur.execute(
+            f"EXPLAIN (FORMAT JSON) SELECT 1 FROM documents WHERE {where or 'true'};", params
+        )
+        plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return float(plan[0]["Plan"]["Plan Rows"])
+
+    def _filter_strategy(self, cur, state: Dict, filters: Dict, where: str, params: Dict):
+        """Choose how a filtered search uses the ANN index.
+
+        Returns (strategy, selectivity): "partial" when a partial index covers
+        the filter exactly; "exact" when the planner expects at most
+        FILTER_EXACT_MAX_ROWS matches (a btree lookup plus exact distances
+        beats walking the ANN index); otherwise "iterative" on pgvector >= 0.8,
+        which keeps scanning the index until enough rows pass, or "ann", which
+        widens ef_search / probes by 1 / selectivity and filters afterwards.
+        """
+        if state["type"] is None:
+            return "exact", 1.0
+        if len(filters) == 1:
+            (key, value), = filters.items()
+            partial = VectorStore._partial_cache
+            if partial is None or not _fresh(VectorStore._partial_cached_at):
+                partial = self._load_partial_indexes(cur)
+            match = partial.get((key, value)) if isinstance(value, str) else None
+            if match and match["quantization"] == state["quantization"]:
+                return "partial", 1.0
+        matches = self._estimate_rows(cur, where, params)
+        if matches <= settings.filter_exact_max_rows:
+            return "exact", 1.0
+        selectivity = min(1.0, matches / max(1.0, self._estimate_rows(cur, "", {})))
+        if self._pgvector_version(cur) >= (0, 8):
+            return "iterative", selectivity
+        return "ann", selectivity
+
+    @classmethod
+    def cached_index_state(cls) -> Dict | None:
+        """The main index's state as last read, or None if it must be re-read."""
+        if cls._index_cache is None or not _fresh(cls._index_cached_at):
+            return None
+        return cls._index_cache
+
+    @classmethod
+    def remember_index_state(cls, row: tuple | None) -> Dict:
+        """Cache the state parsed from an INDEX_STATE_SQL row."""
+        cls._index_cache = _index_state(*row) if row else _index_state(None, None)
+        cls._index_cached_at = time.monotonic()
+        return cls._index_cache
+
+    def _apply_search_params(self, cur, top_k: int, selectivity: float = 1.0) -> Dict:
+        """SET LOCAL the index search knobs; returns the cached index state."""
+        state = VectorStore.cached_index_state()
+        if state is None:
+            cur.execute(INDEX_STATE_SQL, {"index": INDEX_NAME})
+            state = VectorStore.remember_index_state(cur.fetchone())
+        for name, value in search_settings(state, top_k, selectivity).items():
+            cur.execute(f"SET LOCAL {name} = {value};")
+        return state
+
+    def _prepare_search(self, cur, top_k: int, filters: Dict | None) -> Tuple[Dict, str, str, Dict]:
+        """Index state, FROM source, filter SQL and params for one search."""
+        filters = normalize_filters(filters)
+        where, params = filter_clause(filters)
+        state = self._apply_search_params(cur, top_k)
+        if not where:
+            return state, _candidate_source(state), where, params
+        strategy, selectivity = self._filter_strategy(cur, state, filters, where, params)
+        if strategy == "ann" and selectivity < 1.0:
+            self._apply_search_params(cur, top_k, selectivity)
+        elif strategy == "iterative":
+            name = "ivfflat" if state["type"] == "ivfflat" else "hnsw"
+            cur.execute(f"SET LOCAL {name}.iterative_scan = relaxed_order;")
+        get_metrics().inc("vector_search_filtered_total", strategy=strategy)
+        return state, _candidate_source(state, where, strategy), where, params
+
+    def filter_values(self) -> Dict[str, List[str]]:
+        """Distinct values of each filterable attribute, for pickers.
+
+        Empty until the first ingest has created the table and its attribute
+        columns, so the UI can load before any documents exist.
+        """
+        values = {}
+        try:
+            with self._cursor() as cur:
+                for column in ("doc_type", "department"):
+                    cur.execute(
+                        f"SELECT DISTINCT {column} FROM documents "
+                        f"WHERE {column} IS NOT NULL ORDER BY 1;"
+                    )
+                    values[column] = [row[0] for row in cur.fetchall()]
+        except (pg_errors.UndefinedTable, pg_errors.UndefinedColumn):
+            return {}
+        return values
+
+    def _timed_search(self, kind: str, search, *args):
+        metrics = get_metrics()
+        with metrics.timer("vector_search_seconds", backend="postgres", kind=kind) as span:
+            results = search(*args)
+            rows = len(results[0]) if isinstance(results, tuple) else len(results)
+            span["rows_returned"] = rows
+        metrics.inc("vector_search_rows_returned_total", rows, backend="postgres", kind=kind)
         return results
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        threshold: float | None,
+        with_vectors: bool = False,
+        filters: Dict | None = None,
+    ):
+        """Top-k rows by cosine similarity.
+
+        Over a quantized index, top_k * VECTOR_RERANK_FACTOR candidates are
+        taken from the compact index and re-ranked at full precision.
+        filters (see filter_clause) restrict the rows searched, in SQL.
+        With with_vectors=True, returns (results, embeddings) where embeddings
+        is a (len(results), dim) float32 array aligned with results.
+        """
+        return self._timed_search(
+            "vector",
+            self._similarity_search,
+            query_embedding,
+            top_k,
+            threshold,
+            with_vectors,
+            filters,
+        )
+
+    def _similarity_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        threshold: float | None,
+        with_vectors: bool = False,
+        filters: Dict | None = None,
+    ):
+        if not query_embedding:
+            return _parse_rows_with_vectors([]) if with_vectors else []
+        with self._cursor() as cur:
+            state, source, _, params = self._prepare_search(cur, top_k, filters)
+            sql, statement_params = similarity_statement(
+                state, top_k, threshold, with_vectors, source
+            )
+            cur.execute(
+                sql, {**params, **statement_params, "embedding": Vector(query_embedding)}
+            )
+            rows = cur.fetchall()
+        return _parse_rows_with_vectors(rows) if with_vectors else parse_rows(rows)
+
+    def hybrid_search(
+        self,
+        query_embedding: List[float],
+        query_text: str,
+        top_k: int,
+        with_vectors: bool = False,
+        filters: Dict | None = None,
+    ):
+        return self._timed_search(
+            "hybrid",
+            self._hybrid_search,
+            query_embedding,
+            query_text,
+            top_k,
+            with_vectors,
+            filters,
+        )
+
+    def _hybrid_search(
+        self,
+        query_embedding: List[float],
+        query_text: str,
+        top_k: int,
+        with_vectors: bool = False,
+        filters: Dict | None = None,
+    ):
+        """Fuse vector and full-text candidates with reciprocal rank fusion.
+
+        Both candidate lists are ranked server-side in one statement; each
+        contributes weight / (rrf_k + rank) per row. The returned score is
+        still the cosine similarity so callers can display it as before;
+        with_vectors returns (results, vectors, fused scores) so a diversity
+        stage can keep the fused ranking as its relevance term.
+        """
+        if not query_embedding:
+            if with_vectors:
+                return (*_parse_rows_with_vectors([]), np.empty(0, dtype=np.float32))
+            return []
+        candidates = max(top_k, settings.hybrid_candidates)
+        with self._cursor() as cur:
+            state, source, where, params = self._prepare_search(cur, candidates, filters)
+            cur.execute(
+                f"""
+                WITH vector_hits AS (
+                    SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                    FROM (
+                        SELECT id, embedding <=> %(embedding)s AS distance
+                        FROM {source}
+                        ORDER BY embedding <=> %(embedding)s
+                        LIMIT %(candidates)s
+                    ) v
+                ),
+                text_hits AS (
+                    SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+                    FROM (
+                        SELECT id, ts_rank_cd(content_tsv, q.query) AS score
+                        FROM documents,
+                             -- OR the question's lexemes: natural-language questions
+                             -- rarely contain every term of the passage they want.
+                             -- Each lexeme is quoted as a tsquery literal, so
+                             -- punctuation inside it stays part of the term.
+                             (
+                                 SELECT string_agg(
+                                     '''' || replace(replace(lexeme, '\\', '\\\\'), '''', '''''')
+                                         || '''',
+                                     ' | '
+                                 )::tsquery AS query
+                                 FROM unnest(
+                                     tsvector_to_array(to_tsvector({_ts_config()}, %(text)s))
+                                 ) AS lexeme
+                             ) q
+                        WHERE content_tsv @@ q.query {"AND " + where if where else ""}
+                        ORDER BY score DESC
+                        LIMIT %(candidates)s
+                    ) t
+                ),
+                fused AS (
+                    SELECT id, SUM(score) AS score
+                    FROM (
+                        SELECT id, %(vector_weight)s / (%(rrf_k)s + rank) AS score
+                        FROM vector_hits
+                        UNION ALL
+                        SELECT id, %(text_weight)s / (%(rrf_k)s + rank) AS score
+                        FROM text_hits
+                    ) s
+                    GROUP BY id
+                )
+                SELECT d.content, d.metadata, 1 - (d.embedding <=> %(embedding)s)
+                       {", d.embedding, f.score" if with_vectors else ""}
+                FROM fused f
+                JOIN documents d ON d.id = f.id
+                ORDER BY f.score DESC
+                LIMIT %(top_k)s;
+                """,
+                {
+                    **params,
+                    "embedding": Vector(query_embedding),
+                    "text": query_text,
+                    "candidates": candidates,
+                    "shortlist": _shortlist(state, candidates),
+                    "vector_weight": float(settings.hybrid_vector_weight),
+                    "text_weight": float(settings.hybrid_text_weight),
+                    "rrf_k": float(settings.hybrid_rrf_k),
+                    "top_k": top_k,
+                },
+            )
+            rows = cur.fetchall()
+        if not with_vectors:
+            return parse_rows(rows)
+        fused = np.array([float(row[4]) for row in rows], dtype=np.float32)
+        return (*_parse_rows_with_vectors(rows), fused)
+
+
+def open_vector_store():
+    """Return the search backend selected by VECTOR_BACKEND."""
+    if settings.vector_backend == "numpy":
+        from src.numpy_store import NumpyVectorStore
+
+        return NumpyVectorStore()
+    return VectorStore()